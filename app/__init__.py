@@ -1,3 +1,7 @@
+try:
+    from .services.startup import profile as startup_profile
+except ImportError:
+    from services.startup import profile as startup_profile
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -8,6 +12,10 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 from typing import cast
+try:
+    from .services.replicas import RoutingSession
+except ImportError:
+    from services.replicas import RoutingSession
 
 # Cargar variables de entorno desde app/.env si existe (más robusto que load_dotenv() a ciegas)
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -18,13 +26,17 @@ else:
     # fallback: intentar cargar .env en el cwd u otros lugares
     load_dotenv()
 
-db = SQLAlchemy()
+# Las lecturas de vistas @read_only pueden ir a una réplica (services/replicas.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 # csrf may be initialized inside create_app; keep a module-level placeholder
 csrf = None
 
-def create_app():
+def create_app(config=None):
+    """Crea la aplicación; config sustituye valores leídos del entorno
+    (p. ej. SQLALCHEMY_DATABASE_URI en benchmarks y pruebas de carga)"""
+    startup_profile.mark('importaciones')
     app = Flask(__name__)
     
     # Configuración
@@ -39,17 +51,115 @@ def create_app():
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///quadra.db'
     
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Al iniciar: 'version' compara alembic_version con head y solo crea tablas
+    # en una base vacía; 'create_all' revisa todas las tablas en cada arranque
+    app.config['STARTUP_SCHEMA_CHECK'] = os.environ.get('STARTUP_SCHEMA_CHECK', 'version')
+    
+    # Perfil del motor (services/engine.py): auto, sqlite, postgres o none
+    app.config['DB_PROFILE'] = os.environ.get('DB_PROFILE', 'auto')
+    # SQLite: PRAGMA aplicados en cada conexión (WAL siempre)
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # negativo = KiB
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # ms
+    # PostgreSQL: pool de conexiones y límites por sentencia (ms)
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_STATEMENT_TIMEOUT'] = int(os.environ.get('DB_STATEMENT_TIMEOUT', 15000))
+    app.config['DB_LOCK_TIMEOUT'] = int(os.environ.get('DB_LOCK_TIMEOUT', 5000))
+    try:
+        from .services import engine as engine_profiles
+    except ImportError:
+        from app.services import engine as engine_profiles
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_profiles.engine_options(app.config)
+    # Réplicas de lectura (URLs separadas por comas) y ventana pegada al primario tras escribir
+    app.config['REPLICA_DATABASE_URLS'] = os.environ.get('REPLICA_DATABASE_URLS', '')
+    app.config['REPLICA_STICKY_SECONDS'] = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
     
     # Configurar rutas de uploads usando rutas absolutas para producción
     upload_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     app.config['UPLOAD_FOLDER'] = upload_folder
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    # Backend de almacenamiento de uploads (services/storage.py); 'local' usa UPLOAD_FOLDER
+    app.config['UPLOAD_STORAGE'] = os.environ.get('UPLOAD_STORAGE', 'local')
+    # Entrega de uploads: direct (Flask), x-accel (nginx) o x-sendfile (Apache/lighttpd)
+    app.config['UPLOAD_SERVE_MODE'] = os.environ.get('UPLOAD_SERVE_MODE', 'direct')
+    app.config['UPLOAD_ACCEL_PREFIX'] = os.environ.get('UPLOAD_ACCEL_PREFIX', '/_protected_uploads/')
+    app.config['UPLOAD_CACHE_MAX_AGE'] = int(os.environ.get('UPLOAD_CACHE_MAX_AGE', 86400))
+    app.config['USE_X_SENDFILE'] = app.config['UPLOAD_SERVE_MODE'] == 'x-sendfile'
+    
+    # Mapa: por debajo de este zoom /api/stands/bbox devuelve grupos en lugar de puntos
+    app.config['MAP_CLUSTER_MAX_ZOOM'] = int(os.environ.get('MAP_CLUSTER_MAX_ZOOM', 13))
+    app.config['MAP_MAX_POINTS'] = int(os.environ.get('MAP_MAX_POINTS', 500))
+    
+    # Segundos que se conservan en memoria las facetas de filtros (municipios/estados)
+    app.config['FACET_CACHE_TTL'] = int(os.environ.get('FACET_CACHE_TTL', 300))
+    
+    # Tablas de clasificación: promedio bayesiano con media y peso a priori
+    app.config['LEADERBOARD_PRIOR_MEAN'] = float(os.environ.get('LEADERBOARD_PRIOR_MEAN', 3.0))
+    app.config['LEADERBOARD_PRIOR_WEIGHT'] = float(os.environ.get('LEADERBOARD_PRIOR_WEIGHT', 5))
+    app.config['LEADERBOARD_SIZE'] = int(os.environ.get('LEADERBOARD_SIZE', 20))
+    
+    # Rate limiting: 'memory' (un worker) o 'sqlite:///<ruta>' compartido entre workers
+    app.config['RATELIMIT_STORAGE'] = os.environ.get('RATELIMIT_STORAGE', 'memory')
+    # Login: intentos por IP (no se reinicia) y por IP y usuario (se reinicia al entrar)
+    app.config['RATELIMIT_LOGIN'] = os.environ.get('RATELIMIT_LOGIN', '20/300')
+    app.config['RATELIMIT_LOGIN_ACCOUNT'] = os.environ.get('RATELIMIT_LOGIN_ACCOUNT', '5/300')
+    app.config['RATELIMIT_FORGOT_PASSWORD'] = os.environ.get('RATELIMIT_FORGOT_PASSWORD', '3/300')
+    # Proxies de confianza delante de la app (nginx, balanceador); 0 = ignorar X-Forwarded-*
+    app.config['PROXY_FIX_HOPS'] = int(os.environ.get('PROXY_FIX_HOPS', 0))
+    
+    # Hash de contraseñas: método de werkzeug con factor de trabajo explícito
+    # (calibrar con `flask passwords calibrate`); 0 hilos = verificar en línea
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+    
+    # Caché de identidad del usuario autenticado (segundos y número de usuarios)
+    app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+    app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    
+    # Limpieza de tokens de recuperación vencidos (segundos entre barridos; 0 = desactivada)
+    app.config['RESET_TOKEN_SWEEP_INTERVAL'] = int(os.environ.get('RESET_TOKEN_SWEEP_INTERVAL', 900))
+    app.config['RESET_TOKEN_SWEEP_BATCH'] = int(os.environ.get('RESET_TOKEN_SWEEP_BATCH', 500))
+    
+    # Hilos que generan las versiones (miniatura, detalle, WebP) de las imágenes subidas
+    app.config['IMAGE_WORKERS'] = int(os.environ.get('IMAGE_WORKERS', 2))
+    # Segundos en 'processing' tras los que una imagen se considera abandonada y se reencola
+    app.config['IMAGE_STALE_SECONDS'] = int(os.environ.get('IMAGE_STALE_SECONDS', 600))
+    
+    # Filas por lote en `flask stands import` (un COPY / executemany por lote)
+    app.config['STAND_IMPORT_BATCH_SIZE'] = int(os.environ.get('STAND_IMPORT_BATCH_SIZE', 1000))
+    # Filas que se leen por lote al exportar (yield_per; cursor del servidor en PostgreSQL)
+    app.config['EXPORT_BATCH_SIZE'] = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    
+    # Configuración explícita del llamador (el perfil del motor depende de la URL)
+    if config:
+        app.config.update(config)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_profiles.engine_options(app.config)
+    
+    # Solo se confía en los últimos PROXY_FIX_HOPS saltos de X-Forwarded-*;
+    # el resto del encabezado lo controla el cliente
+    if app.config['PROXY_FIX_HOPS'] > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config['PROXY_FIX_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
     
     # Asegurar que el directorio de uploads existe
-    os.makedirs(upload_folder, exist_ok=True)
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    
+    startup_profile.mark('configuración')
     
     # Inicializar extensiones
     db.init_app(app)
+    engine_profiles.install(app)
+    try:
+        from .services import replicas
+    except ImportError:
+        from app.services import replicas
+    replicas.init_app(app)
+    startup_profile.mark('base de datos (engine y réplicas)')
     migrate.init_app(app, db)
     login_manager.init_app(app)
 
@@ -84,6 +194,7 @@ def create_app():
     setattr(login_manager, 'login_view', 'auth.login')
     login_manager.login_message = 'Por favor, inicia sesión para acceder a esta página.'
     login_manager.login_message_category = 'info'
+    startup_profile.mark('extensiones (migrate, login, CSRF, CORS)')
     
     # Registrar Blueprints con imports relativos
     try:
@@ -100,21 +211,41 @@ def create_app():
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(food_stands_bp, url_prefix='/stands')
+    startup_profile.mark('blueprints')
+    
+    # Registrar comandos de CLI (flask leaderboard ..., etc.)
+    try:
+        from .commands import register_commands
+    except ImportError:
+        from app.commands import register_commands
+    register_commands(app)
+    
+    # URL de la versión adecuada de la imagen de un puesto en las plantillas
+    try:
+        from .services.images import stand_image_url
+    except ImportError:
+        from app.services.images import stand_image_url
+    app.jinja_env.globals['stand_image_url'] = stand_image_url
     
     # Ruta para servir archivos de uploads desde el volumen persistente
     @app.route('/static/uploads/<filename>')
     def uploaded_file(filename):
         """Servir archivos de uploads desde el volumen persistente"""
-        from flask import send_from_directory
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+        try:
+            from .services.storage import serve_upload
+        except ImportError:
+            from app.services.storage import serve_upload
+        return serve_upload(filename)
+    
+    # User loader para Flask-Login: identidad en caché (services/identity.py)
+    try:
+        from .services.identity import load_identity
+    except ImportError:
+        from app.services.identity import load_identity
     
-    # User loader para Flask-Login
     @login_manager.user_loader
     def load_user(user_id):
-        try:
-            from .models.user import User
-        except ImportError:
-            from app.models.user import User
-        return User.query.get(int(user_id))
+        return load_identity(user_id)
     
+    startup_profile.mark('comandos y servicios')
     return app
@@ -0,0 +1,225 @@
+"""
+Comandos de línea de comandos de QUADRA (se registran en create_app).
+
+Uso: flask --app app.run <grupo> <comando>
+"""
+
+import json
+
+import click
+from flask.cli import AppGroup
+
+from app import db
+
+leaderboard_cli = AppGroup('leaderboard', help='Tablas de puestos mejor calificados.')
+search_cli = AppGroup('search', help='Índice de búsqueda de texto completo.')
+passwords_cli = AppGroup('passwords', help='Política de hash de contraseñas.')
+tokens_cli = AppGroup('tokens', help='Tokens de recuperación de contraseña.')
+replicas_cli = AppGroup('replicas', help='Réplicas de lectura.')
+stands_cli = AppGroup('stands', help='Importación y exportación masiva de puestos.')
+images_cli = AppGroup('images', help='Versiones de las imágenes de puestos.')
+
+
+@leaderboard_cli.command('rebuild')
+def rebuild_leaderboards():
+    """Recalcula los puntajes bayesianos y todas las tablas de clasificación."""
+    from app.services import leaderboard
+
+    with db.engine.begin() as connection:
+        leaderboard.rebuild(connection)
+    click.echo('✅ Tablas de clasificación recalculadas')
+
+
+@search_cli.command('rebuild')
+def rebuild_search_index():
+    """Crea (si falta) y vuelve a llenar el índice de búsqueda de puestos."""
+    from app.services import search
+
+    with db.engine.begin() as connection:
+        search.install(connection)
+        search.rebuild(connection)
+    click.echo('✅ Índice de búsqueda reconstruido')
+
+
+@passwords_cli.command('calibrate')
+@click.option('--algorithm', type=click.Choice(['scrypt', 'pbkdf2']), default='scrypt', show_default=True)
+@click.option('--target-ms', type=int, default=250, show_default=True,
+              help='Latencia objetivo de una verificación en este equipo.')
+@click.option('--samples', type=int, default=3, show_default=True)
+def calibrate_passwords(algorithm, target_ms, samples):
+    """Elige el factor de trabajo que cumple la latencia objetivo."""
+    from app.services import passwords
+
+    measured, chosen = passwords.calibrate(algorithm, target_ms, samples)
+    for method, elapsed_ms in measured:
+        click.echo(f'   {method:<28} {elapsed_ms:8.1f} ms')
+    click.echo(f'✅ PASSWORD_HASH_METHOD={chosen}')
+
+
+@tokens_cli.command('sweep')
+@click.option('--batch-size', type=int, default=500, show_default=True)
+def sweep_reset_tokens(batch_size):
+    """Elimina por lotes los tokens de recuperación vencidos."""
+    from app.services.reset_tokens import sweep_expired
+
+    deleted = sweep_expired(batch_size)
+    click.echo(f'✅ Tokens vencidos eliminados: {deleted}')
+
+
+@replicas_cli.command('sync')
+def sync_replicas():
+    """Copia la base SQLite primaria a las réplicas SQLite (pruebas locales)."""
+    from flask import current_app
+    from app.services.replicas import sync_sqlite_replicas
+
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('Solo aplica cuando el primario es SQLite')
+    synced = sync_sqlite_replicas(db.engine, current_app.extensions.get('read_replicas', []))
+    for path in synced:
+        click.echo(f'   {path}')
+    click.echo(f'✅ Réplicas sincronizadas: {len(synced)}')
+
+
+@stands_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['auto', 'csv', 'geojson']), default='auto',
+              show_default=True)
+@click.option('--owner', required=True, help='Usuario (nombre o id) dueño de los puestos.')
+@click.option('--batch-size', type=int, default=None,
+              help='Filas por lote (por omisión STAND_IMPORT_BATCH_SIZE).')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False),
+              help='CSV donde escribir las filas rechazadas.')
+@click.option('--checkpoint', 'checkpoint_key',
+              help='Clave del progreso en stand_imports (por omisión la ruta absoluta del archivo).')
+@click.option('--restart', is_flag=True, help='Ignora el checkpoint y empieza desde la primera fila.')
+def import_stands(path, fmt, owner, batch_size, errors_path, checkpoint_key, restart):
+    """Importa puestos desde CSV o GeoJSON por lotes, reanudable."""
+    import csv
+    from flask import current_app
+    from app.models.user import User
+    from app.services.stand_import import (Checkpoint, detect_format, import_stands as run_import,
+                                           trim_error_report)
+
+    user = User.query.filter_by(username=owner).first()
+    if user is None and owner.isdigit():
+        user = db.session.get(User, int(owner))
+    if user is None:
+        raise click.ClickException(f'No existe el usuario {owner}')
+
+    try:
+        fmt = detect_format(path) if fmt == 'auto' else fmt
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    batch_size = batch_size or current_app.config['STAND_IMPORT_BATCH_SIZE']
+    if batch_size < 1:
+        raise click.ClickException('--batch-size debe ser mayor que cero')
+
+    checkpoint = Checkpoint(checkpoint_key, path)
+    if not restart:
+        try:
+            resumed = checkpoint.load()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        if resumed and checkpoint.completed:
+            click.echo(f'✅ {path} ya se importó ({checkpoint.inserted} puestos); usa --restart para repetir')
+            return
+        if resumed:
+            click.echo(f'↩️  Reanudando después de la fila {checkpoint.last_row}')
+
+    errors_file = None
+    error_writer = None
+    if errors_path:
+        # En una reanudación se agregan al reporte existente, sin las filas
+        # posteriores al checkpoint (se vuelven a procesar)
+        append = checkpoint.last_row > 0 and trim_error_report(errors_path, checkpoint.last_row)
+        errors_file = open(errors_path, 'a' if append else 'w', newline='', encoding='utf-8')
+        writer = csv.writer(errors_file)
+        if not append:
+            writer.writerow(['row', 'error', 'data'])
+
+        def error_writer(number, message, row):
+            writer.writerow([number, message, json.dumps(row, ensure_ascii=False, default=str)])
+            # Sin búfer pendiente si el proceso se interrumpe antes del checkpoint
+            errors_file.flush()
+
+    def progress(summary):
+        processed = summary['rows'] - summary['resumed_from']
+        rate = processed / summary['elapsed'] if summary['elapsed'] else 0
+        click.echo(f'   fila {summary["rows"]:>9}  insertados {summary["inserted"]:>9}  '
+                   f'errores {summary["errors"]:>6}  {rate:,.0f} filas/s')
+
+    try:
+        summary = run_import(path, user.id, fmt=fmt, batch_size=batch_size, checkpoint=checkpoint,
+                             error_writer=error_writer, progress=progress)
+    finally:
+        if errors_file:
+            errors_file.close()
+
+    processed = summary['rows'] - summary['resumed_from']
+    rate = processed / summary['elapsed'] if summary['elapsed'] else 0
+    click.echo(f'✅ Puestos importados: {summary["inserted"]} · filas con error: {summary["errors"]} · '
+               f'{rate:,.0f} filas/s ({summary["elapsed"]:.1f} s, {summary["batches"]} lotes)')
+
+
+@stands_cli.command('export')
+@click.argument('output', type=click.Path(dir_okay=False, allow_dash=True), default='-')
+@click.option('--format', 'fmt', type=click.Choice(['geojson', 'ndjson']), default='geojson',
+              show_default=True)
+@click.option('--state', help='Solo puestos de este estado.')
+@click.option('--municipality', help='Solo puestos de este municipio.')
+@click.option('--bbox', type=float, nargs=4, metavar='SOUTH WEST NORTH EAST',
+              help='Solo puestos dentro de la caja.')
+@click.option('--gzip', 'compress', is_flag=True, help='Comprime la salida (implícito si OUTPUT termina en .gz).')
+@click.option('--batch-size', type=int, default=None,
+              help='Filas por lote (por omisión EXPORT_BATCH_SIZE).')
+def export_stands(output, fmt, state, municipality, bbox, compress, batch_size):
+    """Exporta los puestos activos en streaming a OUTPUT (o a la salida estándar)."""
+    import time
+    from flask import current_app
+    from app.services import export
+
+    compress = compress or output.endswith('.gz')
+    batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+    query = export.export_query(state=state, municipality=municipality, bbox=bbox or None)
+
+    started = time.perf_counter()
+    written = 0
+    # Contexto de petición para construir las URLs de imagen igual que la API
+    with current_app.test_request_context(), click.open_file(output, 'wb') as target:
+        for chunk in export.stream(query, fmt, batch_size=batch_size, compress=compress):
+            target.write(chunk)
+            written += len(chunk)
+
+    if output != '-':
+        click.echo(f'✅ Exportados {written / 1024:,.0f} KiB a {output} '
+                   f'en {time.perf_counter() - started:.1f} s')
+
+
+@images_cli.command('requeue')
+@click.option('--stale-seconds', type=int, default=None,
+              help='Antigüedad mínima en processing (por omisión IMAGE_STALE_SECONDS).')
+@click.option('--all', 'include_ready', is_flag=True,
+              help='También genera las versiones que falten a los puestos ya procesados.')
+def requeue_images(stale_seconds, include_ready):
+    """Vuelve a procesar las imágenes que quedaron en processing."""
+    from flask import current_app
+    from app.services.images import backfill_renditions, requeue_stale
+
+    app = current_app._get_current_object()
+    futures = requeue_stale(app, stale_seconds)
+    if include_ready:
+        futures += backfill_renditions(app)
+    for future in futures:
+        future.result()
+    click.echo(f'✅ Imágenes procesadas de nuevo: {len(futures)}')
+
+
+def register_commands(app):
+    """Registra los grupos de comandos en la aplicación"""
+    app.cli.add_command(leaderboard_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(passwords_cli)
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(replicas_cli)
+    app.cli.add_command(stands_cli)
+    app.cli.add_command(images_cli)
@@ -0,0 +1,39 @@
+"""Add geohash spatial key to food_stands
+
+Revision ID: add_food_stand_geohash
+Revises: add_reset_token_fields
+Create Date: 2025-09-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.geo import encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_food_stand_geohash'
+down_revision = 'add_reset_token_fields'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('food_stands', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+        batch_op.create_index('ix_food_stands_geohash', ['geohash'], unique=False)
+
+    # Rellenar el geohash de los puestos existentes
+    connection = op.get_bind()
+    stands = connection.execute(sa.text('SELECT id, latitude, longitude FROM food_stands')).fetchall()
+    for stand_id, latitude, longitude in stands:
+        connection.execute(
+            sa.text('UPDATE food_stands SET geohash = :geohash WHERE id = :id'),
+            {'geohash': encode_geohash(latitude, longitude), 'id': stand_id}
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('food_stands', schema=None) as batch_op:
+        batch_op.drop_index('ix_food_stands_geohash')
+        batch_op.drop_column('geohash')
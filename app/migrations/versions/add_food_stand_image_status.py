@@ -0,0 +1,27 @@
+"""Add image_status to food_stands for background image renditions
+
+Revision ID: add_image_status
+Revises: add_data_versions
+Create Date: 2025-09-14 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_image_status'
+down_revision = 'add_data_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Los puestos existentes quedan en NULL y siguen usando la imagen original
+    with op.batch_alter_table('food_stands', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_status', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('food_stands', schema=None) as batch_op:
+        batch_op.drop_column('image_status')
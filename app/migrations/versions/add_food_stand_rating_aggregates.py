@@ -0,0 +1,37 @@
+"""Add rating aggregates to food_stands
+
+Revision ID: add_rating_aggregates
+Revises: add_food_stand_geohash
+Create Date: 2025-09-03 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_rating_aggregates'
+down_revision = 'add_food_stand_geohash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('food_stands', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('review_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Rellenar los agregados a partir de las reseñas existentes
+    op.execute("""
+        UPDATE food_stands SET
+            rating_sum = COALESCE((SELECT SUM(reviews.rating) FROM reviews
+                                   WHERE reviews.food_stand_id = food_stands.id), 0),
+            review_count = (SELECT COUNT(*) FROM reviews
+                            WHERE reviews.food_stand_id = food_stands.id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('food_stands', schema=None) as batch_op:
+        batch_op.drop_column('review_count')
+        batch_op.drop_column('rating_sum')
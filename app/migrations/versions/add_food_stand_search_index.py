@@ -0,0 +1,28 @@
+"""Add full-text search index for food_stands
+
+Revision ID: add_search_index
+Revises: add_keyset_indexes
+Create Date: 2025-09-10 00:00:00.000000
+
+"""
+from alembic import op
+
+from app.services import search
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_search_index'
+down_revision = 'add_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite: tabla FTS5 + triggers. PostgreSQL: tsvector + GIN + trigramas.
+    connection = op.get_bind()
+    search.install(connection)
+    search.rebuild(connection)
+
+
+def downgrade():
+    search.uninstall(op.get_bind())
@@ -0,0 +1,27 @@
+"""Add (created_at, id) indexes for cursor pagination
+
+Revision ID: add_keyset_indexes
+Revises: add_leaderboards
+Create Date: 2025-09-08 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_keyset_indexes'
+down_revision = 'add_leaderboards'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_food_stands_created_id', 'food_stands', ['created_at', 'id'], unique=False)
+    op.create_index('ix_food_stands_user_created_id', 'food_stands', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_reviews_stand_created_id', 'reviews', ['food_stand_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reviews_stand_created_id', table_name='reviews')
+    op.drop_index('ix_food_stands_user_created_id', table_name='food_stands')
+    op.drop_index('ix_food_stands_created_id', table_name='food_stands')
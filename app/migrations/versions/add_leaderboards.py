@@ -0,0 +1,50 @@
+"""Add Bayesian score and precomputed leaderboards
+
+Revision ID: add_leaderboards
+Revises: add_rating_aggregates
+Create Date: 2025-09-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services import leaderboard
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_leaderboards'
+down_revision = 'add_rating_aggregates'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('food_stands', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bayesian_score', sa.Float(), nullable=True))
+        batch_op.create_index('ix_food_stands_bayesian_score', ['bayesian_score'], unique=False)
+        batch_op.create_index('ix_food_stands_state_score', ['state', 'bayesian_score'], unique=False)
+        batch_op.create_index('ix_food_stands_municipality_score', ['municipality', 'bayesian_score'], unique=False)
+
+    op.create_table('leaderboard_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(length=20), nullable=False),
+    sa.Column('scope_value', sa.String(length=100), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('food_stand_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['food_stand_id'], ['food_stands.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'scope_value', 'rank', name='unique_leaderboard_rank')
+    )
+
+    # Calcular puntajes y tablas para los puestos existentes
+    leaderboard.rebuild(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('leaderboard_entries')
+    with op.batch_alter_table('food_stands', schema=None) as batch_op:
+        batch_op.drop_index('ix_food_stands_municipality_score')
+        batch_op.drop_index('ix_food_stands_state_score')
+        batch_op.drop_index('ix_food_stands_bayesian_score')
+        batch_op.drop_column('bayesian_score')
@@ -0,0 +1,45 @@
+"""Move password reset tokens to a hashed, indexed table
+
+Revision ID: add_password_reset_tokens
+Revises: add_password_generation
+Create Date: 2025-09-22 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_password_reset_tokens'
+down_revision = 'add_password_generation'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('password_reset_tokens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('password_reset_tokens', schema=None) as batch_op:
+        batch_op.create_index('ix_password_reset_tokens_token_hash', ['token_hash'], unique=True)
+        batch_op.create_index('ix_password_reset_tokens_user_id', ['user_id'], unique=False)
+        batch_op.create_index('ix_password_reset_tokens_expires_at', ['expires_at'], unique=False)
+
+    # Los tokens en claro pendientes se descartan: caducaban en una hora
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('reset_token_expires')
+        batch_op.drop_column('reset_token')
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reset_token', sa.String(length=128), nullable=True))
+        batch_op.add_column(sa.Column('reset_token_expires', sa.DateTime(), nullable=True))
+
+    op.drop_table('password_reset_tokens')
@@ -0,0 +1,35 @@
+"""Store bulk stand import checkpoints in the database
+
+Revision ID: add_stand_imports
+Revises: add_password_reset_tokens
+Create Date: 2025-09-28 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_stand_imports'
+down_revision = 'add_password_reset_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # El checkpoint se confirma en la misma transacción que cada lote importado
+    op.create_table('stand_imports',
+    sa.Column('key', sa.String(length=500), nullable=False),
+    sa.Column('source', sa.String(length=500), nullable=False),
+    sa.Column('last_row', sa.Integer(), nullable=False),
+    sa.Column('inserted', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.Integer(), nullable=False),
+    sa.Column('locations', sa.Text(), nullable=True),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('stand_imports')
@@ -0,0 +1,49 @@
+"""Backfill created_at and make it NOT NULL on food_stands and reviews
+
+Revision ID: require_created_at
+Revises: add_stand_imports
+Create Date: 2025-09-29 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services import search
+
+
+# revision identifiers, used by Alembic.
+revision = 'require_created_at'
+down_revision = 'add_stand_imports'
+branch_labels = None
+depends_on = None
+
+TABLES = ('food_stands', 'reviews')
+
+
+def upgrade():
+    # La paginación por cursor usa (created_at, id): filas antiguas o
+    # importadas sin fecha toman updated_at o, si tampoco hay, la fecha actual
+    for table in TABLES:
+        op.execute(
+            f'UPDATE {table} SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) '
+            'WHERE created_at IS NULL'
+        )
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+    _restore_search_index()
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
+    _restore_search_index()
+
+
+def _restore_search_index():
+    # En SQLite batch_alter_table recrea food_stands y con ella se pierden los
+    # triggers de food_stands_fts; se vuelven a crear y se reindexa
+    connection = op.get_bind()
+    if connection.dialect.name == 'sqlite':
+        search.install(connection)
+        search.rebuild(connection)
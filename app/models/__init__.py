@@ -2,5 +2,9 @@
 from .user import User
 from .food_stand import FoodStand
 from .review import Review
+from .leaderboard import LeaderboardEntry
+from .data_version import DataVersion
+from .password_reset_token import PasswordResetToken
+from .stand_import import StandImport
 
-__all__ = ['User', 'FoodStand', 'Review']
+__all__ = ['User', 'FoodStand', 'Review', 'LeaderboardEntry', 'DataVersion', 'PasswordResetToken', 'StandImport']
@@ -0,0 +1,13 @@
+from app import db
+from datetime import datetime
+
+class DataVersion(db.Model):
+    """Contador monotónico de cambios de un conjunto de datos (para ETags)"""
+    __tablename__ = 'data_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.name}={self.version}>'
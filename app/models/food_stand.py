@@ -1,4 +1,8 @@
 from app import db
+from app.services.geo import encode_geohash, bounding_box, covering_cells, prefix_upper_bound, nearest_within
+from sqlalchemy import event, and_, or_
+from sqlalchemy.orm import column_property
+from sqlalchemy.orm.attributes import get_history
 from datetime import datetime
 import math
 
@@ -11,16 +15,27 @@ class FoodStand(db.Model):
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
     address = db.Column(db.String(200), nullable=True)
-    # Nuevos campos para ubicación detallada
-    municipality = db.Column(db.String(100), nullable=True)  # Municipio/Alcaldía
-    state = db.Column(db.String(100), nullable=True)         # Estado
+    # Nuevos campos para ubicación detallada. active_history conserva el valor
+    # previo (aunque esté expirado) para sacar al puesto de las tablas anteriores
+    municipality = column_property(db.Column(db.String(100), nullable=True),  # Municipio/Alcaldía
+                                   active_history=True)
+    state = column_property(db.Column(db.String(100), nullable=True), active_history=True)  # Estado
     neighborhood = db.Column(db.String(100), nullable=True)  # Colonia/Barrio
     postal_code = db.Column(db.String(10), nullable=True)    # Código postal
+    # Geohash de la coordenada para acotar búsquedas espaciales con índice
+    geohash = db.Column(db.String(12), nullable=True, index=True)
     
     image_filename = db.Column(db.String(100), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Estado de las versiones de la imagen: processing, ready, failed (None = solo original)
+    image_status = db.Column(db.String(20), nullable=True)
+    # Agregados de calificación mantenidos al escribir reseñas
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Promedio bayesiano usado por las tablas de clasificación
+    bayesian_score = db.Column(db.Float, nullable=True, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    is_active = db.Column(db.Boolean, default=True)
+    is_active = column_property(db.Column(db.Boolean, default=True), active_history=True)
     
     # Clave foránea
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -28,12 +43,20 @@ class FoodStand(db.Model):
     # Relaciones
     reviews = db.relationship('Review', backref='food_stand', lazy=True, cascade='all, delete-orphan')
     
+    __table_args__ = (
+        db.Index('ix_food_stands_state_score', 'state', 'bayesian_score'),
+        db.Index('ix_food_stands_municipality_score', 'municipality', 'bayesian_score'),
+        # Paginación por cursor (created_at, id)
+        db.Index('ix_food_stands_created_id', 'created_at', 'id'),
+        db.Index('ix_food_stands_user_created_id', 'user_id', 'created_at', 'id'),
+    )
+    
     @property
     def average_rating(self):
-        """Calcula el promedio de calificaciones"""
-        if not self.reviews:
+        """Calcula el promedio de calificaciones a partir de los agregados guardados"""
+        if not self.review_count:
             return 0
-        return sum(review.rating for review in self.reviews) / len(self.reviews)
+        return self.rating_sum / self.review_count
     
     def distance_to(self, lat, lng):
         """Calcula la distancia en kilómetros a una coordenada dada usando la fórmula de Haversine"""
@@ -53,10 +76,38 @@ class FoodStand(db.Model):
         return R * c
     
     @classmethod
-    def find_within_radius(cls, lat, lng, radius_km=5):
-        """Encuentra puestos dentro de un radio específico"""
-        stands = cls.query.filter_by(is_active=True).all()
-        return [stand for stand in stands if stand.distance_to(lat, lng) <= radius_km]
+    def filter_bbox(cls, query, south, west, north, east):
+        """Acota una consulta a la caja dada usando las celdas geohash que la
+        cubren (con índice) y las coordenadas exactas."""
+        cell_filters = []
+        for prefix in covering_cells(south, west, north, east):
+            upper = prefix_upper_bound(prefix)
+            if upper is None:
+                cell_filters.append(cls.geohash >= prefix)
+            else:
+                cell_filters.append(and_(cls.geohash >= prefix, cls.geohash < upper))
+
+        return query.filter(
+            or_(*cell_filters),
+            cls.latitude.between(south, north),
+            cls.longitude.between(west, east)
+        )
+    
+    @classmethod
+    def filter_near(cls, query, lat, lng, radius_km):
+        """Acota una consulta a las celdas geohash y la caja lat/lng que
+        contienen el radio dado. El filtro exacto por distancia se aplica después."""
+        return cls.filter_bbox(query, *bounding_box(lat, lng, radius_km))
+    
+    @classmethod
+    def find_within_radius(cls, lat, lng, radius_km=5, with_distance=False):
+        """Encuentra puestos dentro de un radio específico, del más cercano al más lejano.
+        Con with_distance=True devuelve tuplas (puesto, distancia_km)."""
+        stands = cls.filter_near(cls.query.filter_by(is_active=True), lat, lng, radius_km).all()
+        results = nearest_within(stands, lat, lng, radius_km)
+        if with_distance:
+            return results
+        return [stand for stand, _ in results]
     
     @classmethod
     def find_by_location(cls, municipality=None, state=None):
@@ -73,7 +124,58 @@ class FoodStand(db.Model):
     @property
     def total_reviews(self):
         """Cuenta el total de reseñas"""
-        return len(self.reviews)
+        return self.review_count or 0
     
     def __repr__(self):
         return f'<FoodStand {self.name}>'
+
+
+@event.listens_for(FoodStand, 'before_insert')
+@event.listens_for(FoodStand, 'before_update')
+def _update_geohash(mapper, connection, target):
+    """Mantiene el geohash sincronizado con las coordenadas del puesto"""
+    if target.latitude is not None and target.longitude is not None:
+        target.geohash = encode_geohash(target.latitude, target.longitude)
+
+
+@event.listens_for(FoodStand, 'before_insert')
+def _initial_score(mapper, connection, target):
+    """Asigna el puntaje bayesiano inicial (solo el a priori si no hay reseñas)"""
+    from app.services import leaderboard
+    target.bayesian_score = leaderboard.bayesian_score(target.rating_sum, target.review_count)
+
+
+@event.listens_for(FoodStand, 'after_insert')
+def _leaderboard_on_insert(mapper, connection, target):
+    from app.services import leaderboard
+    leaderboard.refresh_for_location(connection, target.state, target.municipality)
+
+
+@event.listens_for(FoodStand, 'after_update')
+def _leaderboard_on_update(mapper, connection, target):
+    """Refresca las tablas si cambió la ubicación o la visibilidad del puesto"""
+    from app.services import leaderboard
+    histories = {name: get_history(target, name) for name in ('state', 'municipality', 'is_active')}
+    if not any(history.has_changes() for history in histories.values()):
+        return
+
+    leaderboard.refresh_for_location(connection, target.state, target.municipality)
+    old_state = histories['state'].deleted[0] if histories['state'].deleted else None
+    old_municipality = histories['municipality'].deleted[0] if histories['municipality'].deleted else None
+    if old_state and old_state != target.state:
+        leaderboard.refresh_scope(connection, leaderboard.SCOPE_STATE, old_state)
+    if old_municipality and old_municipality != target.municipality:
+        leaderboard.refresh_scope(connection, leaderboard.SCOPE_MUNICIPALITY, old_municipality)
+
+
+@event.listens_for(FoodStand, 'before_delete')
+def _leaderboard_before_delete(mapper, connection, target):
+    from app.models.leaderboard import LeaderboardEntry
+    entries = LeaderboardEntry.__table__
+    connection.execute(entries.delete().where(entries.c.food_stand_id == target.id))
+
+
+@event.listens_for(FoodStand, 'after_delete')
+def _leaderboard_after_delete(mapper, connection, target):
+    from app.services import leaderboard
+    leaderboard.refresh_for_location(connection, target.state, target.municipality)
@@ -0,0 +1,20 @@
+from app import db
+
+class LeaderboardEntry(db.Model):
+    """Posición precalculada de un puesto en una tabla de clasificación"""
+    __tablename__ = 'leaderboard_entries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)         # global, state o municipality
+    scope_value = db.Column(db.String(100), nullable=False)  # '' para la tabla global
+    rank = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    
+    food_stand_id = db.Column(db.Integer, db.ForeignKey('food_stands.id', ondelete='CASCADE'), nullable=False)
+    
+    food_stand = db.relationship('FoodStand')
+    
+    __table_args__ = (db.UniqueConstraint('scope', 'scope_value', 'rank', name='unique_leaderboard_rank'),)
+    
+    def __repr__(self):
+        return f'<LeaderboardEntry {self.scope}:{self.scope_value} #{self.rank}>'
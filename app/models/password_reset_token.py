@@ -0,0 +1,47 @@
+from app import db
+from datetime import datetime, timedelta
+import hashlib
+import secrets
+
+class PasswordResetToken(db.Model):
+    """Token de recuperación de contraseña; solo se guarda su SHA-256"""
+    __tablename__ = 'password_reset_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    token_hash = db.Column(db.String(64), nullable=False, unique=True, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    user = db.relationship('User')
+    
+    LIFETIME = timedelta(hours=1)
+    
+    @staticmethod
+    def hash_token(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def issue(cls, user):
+        """Crea un token para el usuario (reemplaza los anteriores) y devuelve el valor en claro"""
+        cls.query.filter_by(user_id=user.id).delete(synchronize_session=False)
+        token = secrets.token_urlsafe(32)
+        db.session.add(cls(
+            token_hash=cls.hash_token(token),
+            user_id=user.id,
+            expires_at=datetime.utcnow() + cls.LIFETIME
+        ))
+        return token
+    
+    @classmethod
+    def find_valid(cls, token):
+        """Token vigente con ese valor (una búsqueda por índice único), o None"""
+        if not token:
+            return None
+        return cls.query.filter(
+            cls.token_hash == cls.hash_token(token),
+            cls.expires_at > datetime.utcnow()
+        ).first()
+    
+    def __repr__(self):
+        return f'<PasswordResetToken user={self.user_id} expires={self.expires_at}>'
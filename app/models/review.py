@@ -1,21 +1,67 @@
 from app import db
+from app.models.food_stand import FoodStand
+from app.services import leaderboard
+from sqlalchemy import event
+from sqlalchemy.orm import column_property
+from sqlalchemy.orm.attributes import get_history
 from datetime import datetime
 
 class Review(db.Model):
     __tablename__ = 'reviews'
     
     id = db.Column(db.Integer, primary_key=True)
-    rating = db.Column(db.Integer, nullable=False)  # 1-5 estrellas
+    # active_history conserva el valor previo para ajustar los agregados del puesto
+    rating = column_property(db.Column(db.Integer, nullable=False), active_history=True)  # 1-5 estrellas
     comment = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Claves foráneas
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    food_stand_id = db.Column(db.Integer, db.ForeignKey('food_stands.id'), nullable=False)
+    food_stand_id = column_property(db.Column(db.Integer, db.ForeignKey('food_stands.id'), nullable=False),
+                                    active_history=True)
     
     # Restricción única: un usuario solo puede revisar un puesto una vez
-    __table_args__ = (db.UniqueConstraint('user_id', 'food_stand_id', name='unique_user_food_stand_review'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'food_stand_id', name='unique_user_food_stand_review'),
+        # Paginación por cursor de las reseñas de un puesto
+        db.Index('ix_reviews_stand_created_id', 'food_stand_id', 'created_at', 'id'),
+    )
     
     def __repr__(self):
         return f'<Review {self.rating} stars for FoodStand {self.food_stand_id}>'
+
+
+def _update_stand_rating(connection, food_stand_id, rating_delta, count_delta):
+    """Actualiza los agregados y el puntaje del puesto con un incremento atómico
+    en SQL y refresca sus tablas de clasificación"""
+    stands = FoodStand.__table__
+    connection.execute(
+        stands.update()
+        .where(stands.c.id == food_stand_id)
+        .values(**leaderboard.score_update_values(rating_delta, count_delta))
+    )
+    leaderboard.refresh_for_stand(connection, food_stand_id)
+
+
+@event.listens_for(Review, 'after_insert')
+def _review_inserted(mapper, connection, target):
+    _update_stand_rating(connection, target.food_stand_id, target.rating, 1)
+
+
+@event.listens_for(Review, 'after_delete')
+def _review_deleted(mapper, connection, target):
+    _update_stand_rating(connection, target.food_stand_id, -target.rating, -1)
+
+
+@event.listens_for(Review, 'after_update')
+def _review_updated(mapper, connection, target):
+    rating = get_history(target, 'rating')
+    stand = get_history(target, 'food_stand_id')
+    if not (rating.has_changes() or stand.has_changes()):
+        return
+
+    old_rating = rating.deleted[0] if rating.deleted else target.rating
+    old_stand_id = stand.deleted[0] if stand.deleted else target.food_stand_id
+    _update_stand_rating(connection, old_stand_id, -old_rating, -1)
+    _update_stand_rating(connection, target.food_stand_id, target.rating, 1)
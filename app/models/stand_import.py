@@ -0,0 +1,18 @@
+from app import db
+from datetime import datetime
+
+class StandImport(db.Model):
+    """Progreso de una importación masiva de puestos (checkpoint de `flask stands import`)"""
+    __tablename__ = 'stand_imports'
+    
+    key = db.Column(db.String(500), primary_key=True)
+    source = db.Column(db.String(500), nullable=False)
+    last_row = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Integer, nullable=False, default=0)
+    locations = db.Column(db.Text, nullable=True)  # JSON: [[estado, municipio], ...]
+    completed = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StandImport {self.key} fila={self.last_row}>'
@@ -1,8 +1,13 @@
 from app import db
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
-import secrets
+from app.services.passwords import hash_password, verify_password, needs_rehash
+from datetime import datetime
+
+
+def session_id(user_id, password_generation):
+    """Id de sesión '<id>:<generación>' (ver services/identity.py)"""
+    return f'{user_id}:{password_generation or 0}'
+
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -10,13 +15,12 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    # 255 caracteres admiten cualquier método/factor de PASSWORD_HASH_METHOD
+    password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
-    
-    # Campos para recuperación de contraseña
-    reset_token = db.Column(db.String(128), nullable=True)
-    reset_token_expires = db.Column(db.DateTime, nullable=True)
+    # Sube con cada cambio de contraseña; invalida las sesiones anteriores
+    password_generation = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relaciones
     food_stands = db.relationship('FoodStand', backref='owner', lazy=True, cascade='all, delete-orphan')
@@ -24,28 +28,34 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Establece el hash de la contraseña"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
+        self.password_generation = (self.password_generation or 0) + 1
     
     def check_password(self, password):
         """Verifica si la contraseña es correcta"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
     
-    def generate_reset_token(self):
-        """Genera un token para recuperación de contraseña"""
-        self.reset_token = secrets.token_urlsafe(32)
-        self.reset_token_expires = datetime.utcnow() + timedelta(hours=1)  # Expira en 1 hora
-        return self.reset_token
+    def rehash_if_needed(self, password):
+        """Actualiza el hash a la política actual; llamar tras un check_password correcto"""
+        if needs_rehash(self.password_hash):
+            # Misma contraseña: no cambia la generación ni cierra otras sesiones
+            self.password_hash = hash_password(password)
+            return True
+        return False
+    
+    def get_id(self):
+        """Id de sesión para Flask-Login, con la generación de contraseña"""
+        return session_id(self.id, self.password_generation)
     
-    def verify_reset_token(self, token):
-        """Verifica si el token de recuperación es válido y no ha expirado"""
-        return (self.reset_token == token and 
-                self.reset_token_expires and 
-                self.reset_token_expires > datetime.utcnow())
+    def generate_reset_token(self):
+        """Genera un token para recuperación de contraseña (se guarda hasheado)"""
+        from app.models.password_reset_token import PasswordResetToken
+        return PasswordResetToken.issue(self)
     
     def clear_reset_token(self):
-        """Limpia el token de recuperación después de usarlo"""
-        self.reset_token = None
-        self.reset_token_expires = None
+        """Elimina los tokens de recuperación después de usarlo"""
+        from app.models.password_reset_token import PasswordResetToken
+        PasswordResetToken.query.filter_by(user_id=self.id).delete(synchronize_session=False)
     
     def __repr__(self):
         return f'<User {self.username}>'
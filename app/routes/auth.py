@@ -1,52 +1,33 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, current_user
 from urllib.parse import urlparse
 try:
     from ..models.user import User
+    from ..models.password_reset_token import PasswordResetToken
+    from ..services.ratelimit import rate_limited, get_limiter, client_ip, too_many_requests
     from .. import db
 except ImportError:
     from app.models.user import User
+    from app.models.password_reset_token import PasswordResetToken
+    from app.services.ratelimit import rate_limited, get_limiter, client_ip, too_many_requests
     from app import db
-import time
 import os
 import re
 
 auth_bp = Blueprint('auth', __name__)
 
 
-def check_rate_limit(key, max_attempts=5, window=300):
-    """Verificar rate limiting simple"""
-    now = time.time()
-    attempts_key = f'attempts_{key}'
-    timestamp_key = f'timestamp_{key}'
-
-    if attempts_key not in session:
-        session[attempts_key] = 0
-        session[timestamp_key] = now
-
-    # Resetear si ha pasado el tiempo de ventana
-    if now - session.get(timestamp_key, 0) > window:
-        session[attempts_key] = 0
-        session[timestamp_key] = now
-
-    session[attempts_key] += 1
-
-    return session[attempts_key] <= max_attempts
+LOGIN_LIMIT_MESSAGE = 'Demasiados intentos de inicio de sesión. Inténtalo más tarde.'
 
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@rate_limited('login', 'auth/login.html', LOGIN_LIMIT_MESSAGE)
 def login():
     """Página de inicio de sesión"""
     if current_user.is_authenticated:
         return redirect(url_for('main.dashboard'))
 
     if request.method == 'POST':
-        # Rate limiting
-        client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
-        if not check_rate_limit(f'login_{client_ip}'):
-            flash('Demasiados intentos de inicio de sesión. Inténtalo más tarde.', 'error')
-            return render_template('auth/login.html')
-
         # Asegurar que los valores sean strings (no None) antes de operaciones
         username = (request.form.get('username') or '').strip()
         password = request.form.get('password') or ''
@@ -56,14 +37,23 @@ def login():
             flash('Por favor, completa todos los campos.', 'error')
             return render_template('auth/login.html')
 
+        # Intentos de esta IP contra esta cuenta; se reinicia al acertar
+        account = f'{client_ip()}:{username.lower()}'
+        allowed, retry_after = get_limiter().hit('login_account', account)
+        if not allowed:
+            return too_many_requests('auth/login.html', LOGIN_LIMIT_MESSAGE, retry_after)
+
         user = User.query.filter_by(username=username).first()
 
         if user and user.check_password(password):
+            # Actualizar hashes hechos con una política anterior
+            if user.rehash_if_needed(password):
+                db.session.commit()
+
             login_user(user, remember=remember)
 
-            # Resetear contador de intentos en login exitoso
-            session.pop(f'attempts_login_{client_ip}', None)
-            session.pop(f'timestamp_login_{client_ip}', None)
+            # Resetear solo los intentos contra esta cuenta; los de la IP siguen contando
+            get_limiter().reset('login_account', account)
 
             # Redirigir a la página que intentaba acceder o al dashboard
             next_page = request.args.get('next')
@@ -191,6 +181,8 @@ def send_reset_email(user, token):
 
 
 @auth_bp.route('/forgot-password', methods=['GET', 'POST'])
+@rate_limited('forgot_password', 'auth/forgot_password.html',
+              'Demasiados intentos. Inténtalo más tarde.')
 def forgot_password():
     """Página para solicitar recuperación de contraseña"""
     if current_user.is_authenticated:
@@ -203,12 +195,6 @@ def forgot_password():
             flash('Por favor, ingresa tu email.', 'error')
             return render_template('auth/forgot_password.html')
 
-        # Rate limiting
-        client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
-        if not check_rate_limit(f'reset_{client_ip}', max_attempts=3, window=300):
-            flash('Demasiados intentos. Inténtalo más tarde.', 'error')
-            return render_template('auth/forgot_password.html')
-
         user = User.query.filter_by(email=email).first()
 
         if user:
@@ -236,9 +222,9 @@ def reset_password(token):
     if current_user.is_authenticated:
         return redirect(url_for('main.dashboard'))
 
-    user = User.query.filter_by(reset_token=token).first()
+    reset = PasswordResetToken.find_valid(token)
 
-    if not user or not user.verify_reset_token(token):
+    if not reset:
         flash('El enlace de recuperación es inválido o ha expirado.', 'error')
         return redirect(url_for('auth.forgot_password'))
 
@@ -260,6 +246,7 @@ def reset_password(token):
 
         try:
             # Cambiar contraseña
+            user = reset.user
             user.set_password(password)
             user.clear_reset_token()
             db.session.commit()
@@ -287,8 +274,11 @@ def change_password():
             flash('Por favor, completa todos los campos.', 'error')
             return render_template('auth/change_password.html')
 
+        # current_user es la identidad en caché; para escribir se carga el User
+        user = current_user.load()
+
         # Verificar contraseña actual
-        if not current_user.check_password(current_password):
+        if not user.check_password(current_password):
             flash('La contraseña actual es incorrecta.', 'error')
             return render_template('auth/change_password.html')
 
@@ -305,9 +295,10 @@ def change_password():
             return render_template('auth/change_password.html')
 
         try:
-            # Cambiar contraseña
-            current_user.set_password(new_password)
+            # Cambiar contraseña (cierra las demás sesiones) y renovar la sesión actual
+            user.set_password(new_password)
             db.session.commit()
+            login_user(user)
 
             flash('Tu contraseña ha sido cambiada exitosamente.', 'success')
             return redirect(url_for('main.dashboard'))
@@ -1,17 +1,28 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
+from sqlalchemy import func, case
+from sqlalchemy.orm import joinedload
 try:
     from ..models.food_stand import FoodStand
     from ..models.review import Review
+    from ..services.projections import stand_summary_query, fetch_summaries
+    from ..services.pagination import keyset_paginate
+    from ..services.versioning import conditional_get
+    from ..services.replicas import read_only
+    from ..services.images import process_stand_image, STATUS_PROCESSING
+    from ..services.storage import store_upload
     from .. import db
 except ImportError:
     from app.models.food_stand import FoodStand
     from app.models.review import Review
+    from app.services.projections import stand_summary_query, fetch_summaries
+    from app.services.pagination import keyset_paginate
+    from app.services.versioning import conditional_get
+    from app.services.replicas import read_only
+    from app.services.images import process_stand_image, STATUS_PROCESSING
+    from app.services.storage import store_upload
     from app import db
-import os
-from PIL import Image
 
 food_stands_bp = Blueprint('food_stands', __name__)
 
@@ -21,20 +32,15 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def resize_image(image_path, max_size=(800, 600)):
-    """Redimensiona imagen para optimizar almacenamiento"""
-    with Image.open(image_path) as img:
-        img.thumbnail(max_size, Image.Resampling.LANCZOS)
-        img.save(image_path, optimize=True, quality=85)
-
 @food_stands_bp.route('/')
+@read_only
 @login_required
 def list_stands():
     """Lista todos los puestos de comida activos"""
-    page = request.args.get('page', 1, type=int)
-    stands = FoodStand.query.filter_by(is_active=True)\
-                          .order_by(FoodStand.created_at.desc())\
-                          .paginate(page=page, per_page=12, error_out=False)
+    cursor = request.args.get('cursor')
+    stands = keyset_paginate(stand_summary_query(), FoodStand.created_at, FoodStand.id,
+                             cursor=cursor, per_page=12)
+    stands.items = fetch_summaries(stands.items)
     
     return render_template('food_stands/list.html', stands=stands)
 
@@ -65,34 +71,13 @@ def create_stand():
             file = request.files['image']
             if file and file.filename != '' and allowed_file(file.filename):
                 try:
-                    # Crear directorio de uploads si no existe
-                    upload_dir = os.path.join(current_app.root_path, 'static', 'uploads')
-                    if not os.path.exists(upload_dir):
-                        os.makedirs(upload_dir)
-                    
-                    filename = secure_filename(file.filename)
-                    # Agregar timestamp para evitar conflictos
-                    import time
-                    timestamp = str(int(time.time()))
-                    name_part, ext = os.path.splitext(filename)
-                    image_filename = f"{name_part}_{timestamp}{ext}"
-                    
-                    file_path = os.path.join(upload_dir, image_filename)
-                    
-                    # Verificar tamaño del archivo
-                    file.seek(0, 2)  # Ir al final del archivo
-                    file_size = file.tell()
-                    file.seek(0)  # Volver al inicio
-                    
-                    if file_size > current_app.config['MAX_CONTENT_LENGTH']:
-                        flash('La imagen es demasiado grande. Máximo 16MB.', 'error')
-                        return render_template('food_stands/create.html')
-                    
-                    file.save(file_path)
-                    
-                    # Redimensionar imagen
-                    resize_image(file_path)
+                    # Se guarda por hash de contenido, validando el tamaño mientras se copia;
+                    # las versiones se generan en segundo plano (services/images.py)
+                    image_filename = store_upload(file, current_app.config['MAX_CONTENT_LENGTH'])
                     
+                except RequestEntityTooLarge:
+                    flash('La imagen es demasiado grande. Máximo 16MB.', 'error')
+                    return render_template('food_stands/create.html')
                 except Exception as e:
                     flash(f'Error al procesar la imagen: {str(e)}', 'error')
                     return render_template('food_stands/create.html')
@@ -117,12 +102,16 @@ def create_stand():
                 state=state if state else None,
                 neighborhood=neighborhood if neighborhood else None,
                 image_filename=image_filename,
+                image_status=STATUS_PROCESSING if image_filename else None,
                 user_id=current_user.id
             )
             
             db.session.add(stand)
             db.session.commit()
             
+            if image_filename:
+                process_stand_image(current_app._get_current_object(), stand.id, image_filename)
+            
             flash('¡Puesto de comida creado exitosamente!', 'success')
             return redirect(url_for('food_stands.view_stand', id=stand.id))
         
@@ -133,7 +122,9 @@ def create_stand():
     return render_template('food_stands/create.html')
 
 @food_stands_bp.route('/<int:id>')
+@read_only
 @login_required
+@conditional_get(per_user=True)
 def view_stand(id):
     """Ver detalles de un puesto específico"""
     stand = FoodStand.query.get_or_404(id)
@@ -142,9 +133,10 @@ def view_stand(id):
         flash('Este puesto no está disponible.', 'error')
         return redirect(url_for('food_stands.list_stands'))
     
-    # Obtener reseñas del puesto
-    reviews = Review.query.filter_by(food_stand_id=id)\
-                         .order_by(Review.created_at.desc()).all()
+    # Obtener reseñas del puesto (paginadas por cursor, con su autor en la misma consulta)
+    reviews = keyset_paginate(Review.query.filter_by(food_stand_id=id).options(joinedload(Review.author)),
+                              Review.created_at, Review.id,
+                              cursor=request.args.get('cursor'), per_page=10)
     
     # Verificar si el usuario actual ya ha reseñado este puesto
     user_review = None
@@ -207,10 +199,26 @@ def add_review(id):
     return redirect(url_for('food_stands.view_stand', id=id))
 
 @food_stands_bp.route('/my-stands')
+@read_only
 @login_required
 def my_stands():
     """Ver los puestos creados por el usuario actual"""
-    stands = FoodStand.query.filter_by(user_id=current_user.id, is_active=True)\
-                          .order_by(FoodStand.created_at.desc()).all()
+    my_query = FoodStand.query.filter_by(user_id=current_user.id, is_active=True)
+    stands = keyset_paginate(my_query, FoodStand.created_at, FoodStand.id,
+                             cursor=request.args.get('cursor'), per_page=12)
+    
+    # Estadísticas de todos los puestos del usuario en una sola consulta
+    totals = my_query.with_entities(
+        func.count(FoodStand.id),
+        func.sum(FoodStand.review_count),
+        func.avg(case((FoodStand.review_count > 0, FoodStand.rating_sum * 1.0 / FoodStand.review_count), else_=0)),
+        func.sum(case((FoodStand.review_count > 0, 1), else_=0))
+    ).one()
+    stats = {
+        'total_stands': totals[0] or 0,
+        'total_reviews': totals[1] or 0,
+        'average_rating': totals[2] or 0,
+        'with_reviews': totals[3] or 0
+    }
     
-    return render_template('food_stands/my_stands.html', stands=stands)
+    return render_template('food_stands/my_stands.html', stands=stands, stats=stats)
@@ -1,40 +1,38 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, current_app, stream_with_context
 from flask_login import login_required, current_user
 try:
     from ..models.food_stand import FoodStand
     from ..models.review import Review
+    from ..services.geo import nearest_within
+    from ..services import leaderboard, search
+    from ..services.projections import stand_summary_query, fetch_summaries, stand_clusters, stand_stats
+    from ..services.geo import cluster_precision
+    from ..services.facets import facet_cache
+    from ..services.versioning import conditional_get
+    from ..services.replicas import read_only
+    from ..services import export
     from .. import db
 except ImportError:
     from app.models.food_stand import FoodStand
     from app.models.review import Review
+    from app.services.geo import nearest_within
+    from app.services import leaderboard, search
+    from app.services.projections import stand_summary_query, fetch_summaries, stand_clusters, stand_stats
+    from app.services.geo import cluster_precision
+    from app.services.facets import facet_cache
+    from app.services.versioning import conditional_get
+    from app.services.replicas import read_only
+    from app.services import export
     from app import db
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
+@read_only
+@conditional_get(per_user=True)
 def index():
-    """Página principal - mapa público con todos los puestos"""
-    # Obtener todos los puestos activos para mostrar en el mapa
-    food_stands = FoodStand.query.filter_by(is_active=True).order_by(FoodStand.created_at.desc()).all()
-    
-    # Preparar datos para el mapa
-    stands_data = []
-    for stand in food_stands:
-        stands_data.append({
-            'id': stand.id,
-            'name': stand.name,
-            'description': stand.description[:100] + '...' if len(stand.description) > 100 else stand.description,
-            'latitude': stand.latitude,
-            'longitude': stand.longitude,
-            'address': stand.address,
-            'image_filename': stand.image_filename,
-            'average_rating': round(stand.average_rating, 1),
-            'total_reviews': stand.total_reviews,
-            'owner': stand.owner.username,
-            'created_at': stand.created_at.strftime('%d/%m/%Y')
-        })
-    
-    return render_template('index.html', food_stands=stands_data)
+    """Página principal - mapa público; los puestos se cargan por viewport desde /api/stands/bbox"""
+    return render_template('index.html', stats=stand_stats())
 
 @main_bp.route('/landing')
 def landing():
@@ -42,6 +40,7 @@ def landing():
     return render_template('landing.html')
 
 @main_bp.route('/dashboard')
+@read_only
 @login_required
 def dashboard():
     """Dashboard principal para usuarios autenticados con filtros"""
@@ -56,47 +55,58 @@ def dashboard():
     # Construir query base
     stands_query = FoodStand.query.filter_by(is_active=True)
     
-    # Aplicar filtro de búsqueda por nombre
+    # Aplicar búsqueda de texto completo (nombre, descripción y ubicación, sin
+    # acentos) en la misma consulta que los demás filtros, ordenada por relevancia
     if search_query:
-        stands_query = stands_query.filter(FoodStand.name.ilike(f'%{search_query}%'))
+        stands_query = search.filter_stands(stands_query, db.engine.dialect.name, search_query)
     
-    # Aplicar filtro por municipio
+    # Aplicar filtro por municipio (valor exacto de la lista, usa índice)
     if municipality_filter:
-        stands_query = stands_query.filter(FoodStand.municipality.ilike(f'%{municipality_filter}%'))
+        stands_query = stands_query.filter(FoodStand.municipality == municipality_filter)
     
-    # Aplicar filtro por estado
+    # Aplicar filtro por estado (valor exacto de la lista, usa índice)
     if state_filter:
-        stands_query = stands_query.filter(FoodStand.state.ilike(f'%{state_filter}%'))
-    
-    # Obtener resultados
-    filtered_stands = stands_query.all()
-    
-    # Aplicar filtro de radio si hay coordenadas
-    if radius_filter and user_lat and user_lng:
-        filtered_stands = [stand for stand in filtered_stands 
-                          if stand.distance_to(user_lat, user_lng) <= radius_filter]
+        stands_query = stands_query.filter(FoodStand.state == state_filter)
+    
+    # Acotar por celdas geohash antes de calcular distancias exactas
+    near_filter = bool(radius_filter and user_lat and user_lng)
+    if near_filter:
+        stands_query = FoodStand.filter_near(stands_query, user_lat, user_lng, radius_filter)
+    
+    # Obtener resultados (los más relevantes, ya filtrados, si hay búsqueda).
+    # Solo se cargan cuando los mejor calificados salen de ellos; si no, la
+    # tabla de clasificación basta y no se lee cada puesto activo por visita.
+    filtered_stands = None
+    if search_query or near_filter or (municipality_filter and state_filter):
+        if search_query:
+            stands_query = stands_query.limit(search.DEFAULT_LIMIT)
+        filtered_stands = stands_query.all()
+    
+    # Aplicar filtro de radio si hay coordenadas (cálculo por lotes, más cercanos primero)
+    if near_filter:
+        filtered_stands = [stand for stand, _ in
+                           nearest_within(filtered_stands, user_lat, user_lng, radius_filter)]
     
     # Puestos recientes (sin filtros para mostrar actividad general)
     recent_stands = FoodStand.query.filter_by(is_active=True).order_by(FoodStand.created_at.desc()).limit(6).all()
     
-    # Puestos mejor calificados (aplicar filtros)
-    top_rated_stands = sorted(filtered_stands, key=lambda x: x.average_rating, reverse=True)[:6]
+    # Puestos mejor calificados (aplicar filtros). Sin búsqueda ni radio se leen
+    # de la tabla de clasificación precalculada del ámbito correspondiente.
+    if filtered_stands is not None:
+        top_rated_stands = sorted(filtered_stands, key=lambda x: x.bayesian_score or 0, reverse=True)[:6]
+    elif municipality_filter:
+        top_rated_stands = leaderboard.top_rated(leaderboard.SCOPE_MUNICIPALITY, municipality_filter)
+    elif state_filter:
+        top_rated_stands = leaderboard.top_rated(leaderboard.SCOPE_STATE, state_filter)
+    else:
+        top_rated_stands = leaderboard.top_rated()
     
     # Mis puestos
     my_stands = FoodStand.query.filter_by(user_id=current_user.id, is_active=True).limit(3).all()
     
-    # Obtener listas únicas para filtros
-    municipalities = db.session.query(FoodStand.municipality).filter(
-        FoodStand.municipality.isnot(None), 
-        FoodStand.is_active == True
-    ).distinct().all()
-    municipalities = [m[0] for m in municipalities if m[0]]
-    
-    states = db.session.query(FoodStand.state).filter(
-        FoodStand.state.isnot(None), 
-        FoodStand.is_active == True
-    ).distinct().all()
-    states = [s[0] for s in states if s[0]]
+    # Obtener listas únicas para filtros (desde la caché de facetas)
+    municipalities = facet_cache.values('municipality')
+    states = facet_cache.values('state')
     
     return render_template('dashboard.html', 
                          recent_stands=recent_stands,
@@ -115,7 +125,9 @@ def dashboard():
                          })
 
 @main_bp.route('/api/stands/nearby')
+@read_only
 @login_required
+@conditional_get()
 def nearby_stands():
     """API para obtener puestos cercanos basado en coordenadas"""
     lat = request.args.get('lat', type=float)
@@ -125,22 +137,106 @@ def nearby_stands():
     if not lat or not lng:
         return jsonify({'error': 'Coordenadas requeridas'}), 400
     
-    # Usar el nuevo método de búsqueda por radio
-    stands = FoodStand.find_within_radius(lat, lng, int(radius))
+    # Acotar por celdas geohash y ordenar por distancia exacta (una sola consulta)
+    query = FoodStand.filter_near(stand_summary_query(), lat, lng, int(radius))
+    stands = nearest_within(fetch_summaries(query), lat, lng, int(radius))
     
     stands_data = []
-    for stand in stands:
-        stands_data.append({
-            'id': stand.id,
-            'name': stand.name,
-            'description': stand.description,
-            'latitude': stand.latitude,
-            'longitude': stand.longitude,
-            'address': stand.address,
-            'image_filename': stand.image_filename,
-            'average_rating': stand.average_rating,
-            'total_reviews': stand.total_reviews,
-            'owner': stand.owner.username
-        })
+    for summary, distance in stands:
+        data = summary.to_dict()
+        data['distance_km'] = round(distance, 3)
+        stands_data.append(data)
     
     return jsonify({'stands': stands_data})
+
+
+@main_bp.route('/api/stands/facets')
+@read_only
+@conditional_get(public=True)
+def stand_facets():
+    """API con los valores disponibles para filtrar (municipios y estados) y su cantidad de puestos"""
+    facets = facet_cache.get()
+    return jsonify({
+        'municipalities': [{'value': value, 'count': count} for value, count in facets['municipality']],
+        'states': [{'value': value, 'count': count} for value, count in facets['state']]
+    })
+
+@main_bp.route('/api/stands/bbox')
+@read_only
+@conditional_get(public=True)
+def stands_in_bbox():
+    """API pública del mapa: puestos dentro del viewport visible.
+
+    Con zoom bajo devuelve grupos agregados (cantidad, centroide y calificación
+    promedio) en lugar de puntos individuales.
+    """
+    south = request.args.get('south', type=float)
+    west = request.args.get('west', type=float)
+    north = request.args.get('north', type=float)
+    east = request.args.get('east', type=float)
+    zoom = request.args.get('zoom', type=int)
+    
+    if None in (south, west, north, east, zoom):
+        return jsonify({'error': 'Parámetros south, west, north, east y zoom requeridos'}), 400
+    
+    # Leaflet puede devolver longitudes fuera de rango al desplazar el mapa
+    south, north = max(south, -90.0), min(north, 90.0)
+    west, east = max(west, -180.0), min(east, 180.0)
+    if south > north or west > east:
+        return jsonify({'error': 'Caja geográfica inválida'}), 400
+    
+    if zoom < current_app.config['MAP_CLUSTER_MAX_ZOOM']:
+        clusters = stand_clusters(south, west, north, east, cluster_precision(zoom))
+        return jsonify({'zoom': zoom, 'clusters': clusters, 'stands': []})
+    
+    max_points = current_app.config['MAP_MAX_POINTS']
+    query = FoodStand.filter_bbox(stand_summary_query(), south, west, north, east)
+    summaries = fetch_summaries(query.order_by(FoodStand.bayesian_score.desc()).limit(max_points + 1))
+    
+    return jsonify({
+        'zoom': zoom,
+        'clusters': [],
+        'stands': [summary.to_dict() for summary in summaries[:max_points]],
+        'truncated': len(summaries) > max_points
+    })
+
+
+@main_bp.route('/api/stands/export')
+@read_only
+@conditional_get(public=True)
+def export_stands():
+    """Exportación en streaming de puestos activos como GeoJSON o NDJSON.
+
+    Filtros opcionales: state, municipality y la caja south/west/north/east.
+    Con gzip=1 el cuerpo se comprime al vuelo (Content-Encoding: gzip).
+    """
+    fmt = request.args.get('format', 'geojson')
+    if fmt not in export.FORMATS:
+        return jsonify({'error': 'Formato inválido (geojson o ndjson)'}), 400
+    
+    bbox = [request.args.get(name, type=float) for name in ('south', 'west', 'north', 'east')]
+    if all(value is None for value in bbox):
+        bbox = None
+    elif None in bbox:
+        return jsonify({'error': 'La caja requiere south, west, north y east'}), 400
+    else:
+        south, west, north, east = bbox
+        south, north = max(south, -90.0), min(north, 90.0)
+        west, east = max(west, -180.0), min(east, 180.0)
+        if south > north or west > east:
+            return jsonify({'error': 'Caja geográfica inválida'}), 400
+        bbox = (south, west, north, east)
+    
+    query = export.export_query(
+        state=request.args.get('state', '').strip() or None,
+        municipality=request.args.get('municipality', '').strip() or None,
+        bbox=bbox
+    )
+    compress = request.args.get('gzip') == '1'
+    body = export.stream(query, fmt, batch_size=current_app.config['EXPORT_BATCH_SIZE'], compress=compress)
+    
+    response = current_app.response_class(stream_with_context(body), mimetype=export.FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=quadra-puestos.{fmt}'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
@@ -3,8 +3,11 @@
 """
 Punto de entrada para ejecutar la aplicación QUADRA
 Ejecutar desde la carpeta app/ o desde la raíz con: python -m app.run
+
+    --profile-startup   imprime el tiempo de cada fase del arranque y termina
 """
 
+import argparse
 import os
 
 try:
@@ -14,13 +17,87 @@ except ImportError:
     # Cuando se ejecuta como módulo desde la raíz
     from . import create_app, db
 
-def main():
+def init_db(app):
+    """Deja el esquema listo: omite create_all si alembic_version ya está en head"""
+    try:
+        from services import search, engine, startup
+    except ImportError:
+        from .services import search, engine, startup
+
+    with app.app_context():
+        with db.engine.connect() as connection:
+            if app.config.get('STARTUP_SCHEMA_CHECK') == 'version':
+                current, head = startup.schema_revisions(app, connection)
+            else:
+                current, head = None, None
+
+        empty = current is None and not db.inspect(db.engine).get_table_names()
+        if current is not None and current == head:
+            with db.engine.begin() as connection:
+                # Bases migradas antes de que require_created_at restaurara los
+                # triggers de búsqueda se quedaron con un índice que no se actualiza
+                if not search.is_installed(connection):
+                    search.install(connection)
+                    search.rebuild(connection)
+                    print("🔎 Índice de búsqueda reinstalado")
+            print(f"✅ Esquema al día ({head})")
+        elif head and current is None and not empty:
+            # Tablas sin alembic_version (creadas con create_all antes de las
+            # migraciones): upgrade desde cero fallaría y create_all no agrega
+            # columnas nuevas, así que la app arrancaría con un esquema viejo
+            raise SystemExit(
+                "❌ La base tiene tablas pero no versión de esquema. Regístrala en la versión base "
+                "y migra antes de arrancar:\n"
+                f"   flask db stamp {startup.BASELINE_REVISION} --directory app/migrations\n"
+                "   flask db upgrade --directory app/migrations"
+            )
+        elif current is not None:
+            # Versionada pero detrás de head: create_all crearía las tablas de
+            # migraciones posteriores sin registrarlas y el upgrade fallaría
+            raise SystemExit(
+                f"❌ Esquema en {current}, head es {head}. Migra antes de arrancar:\n"
+                "   flask db upgrade --directory app/migrations"
+            )
+        else:
+            # Crear todas las tablas si no existen
+            db.create_all()
+            
+            # Índice de búsqueda de texto completo (tabla FTS5/tsvector y triggers)
+            with db.engine.begin() as connection:
+                search.install(connection)
+                # En una base nueva el esquema de los modelos ya es el de head
+                if empty and head:
+                    startup.stamp_head(app, connection)
+            print("✅ Base de datos inicializada")
+        startup.profile.mark('esquema')
+
+        settings = app.extensions.get('db_engine_settings')
+        if settings:
+            print(f"⚙️  Motor: {engine.describe(settings)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor de desarrollo de QUADRA')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Imprimir el tiempo de cada fase del arranque y salir')
+    args = parser.parse_args(argv)
+
     app = create_app()
+    init_db(app)
     
-    with app.app_context():
-        # Crear todas las tablas si no existen
-        db.create_all()
-        print("✅ Base de datos inicializada")
+    if args.profile_startup:
+        try:
+            from services.startup import profile
+        except ImportError:
+            from .services.startup import profile
+        print(profile.report())
+        return
+    
+    try:
+        from services.reset_tokens import start_sweeper
+    except ImportError:
+        from .services.reset_tokens import start_sweeper
+    start_sweeper(app)
     
     print("🚀 Iniciando aplicación QUADRA...")
     print("📍 URL: http://localhost:5000")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor de producción de QUADRA: gunicorn pre-fork con workers y hilos.
+
+Uso (desde la raíz):
+    python start.py serve [--workers N] [--threads N] ...
+    python -m app.serve [opciones]
+
+Cada opción tiene su variable de entorno (SERVE_WORKERS, SERVE_THREADS, ...);
+la línea de comandos tiene prioridad. La app se carga en el proceso maestro
+(preload) y los workers la heredan al hacer fork; el hook post_fork descarta
+el pool de conexiones heredado para que cada worker abra las suyas y
+post_worker_init reencola las imágenes que quedaron a medio procesar y
+arranca el barrido de tokens de recuperación vencidos.
+
+Recarga sin cortar peticiones: `kill -HUP <pid del maestro>` arranca workers
+nuevos y apaga los viejos tras terminar sus peticiones (con preload, el
+código nuevo requiere reiniciar el maestro o usar --no-preload).
+"""
+
+import argparse
+import multiprocessing
+import os
+
+try:
+    # Cuando se ejecuta desde la carpeta app/
+    from __init__ import create_app, db
+    from run import init_db
+except ImportError:
+    # Cuando se ejecuta como módulo desde la raíz
+    from . import create_app, db
+    from .run import init_db
+
+
+def default_workers():
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def parse_args(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(prog='serve', description='Servidor de producción de QUADRA (gunicorn)')
+    parser.add_argument('--bind', default=env('SERVE_BIND', f"0.0.0.0:{env('PORT', '5000')}"))
+    parser.add_argument('--workers', type=int, default=int(env('SERVE_WORKERS', default_workers())),
+                        help='Procesos worker (por defecto 2 × núcleos + 1)')
+    parser.add_argument('--threads', type=int, default=int(env('SERVE_THREADS', 4)),
+                        help='Hilos por worker (gthread)')
+    parser.add_argument('--keepalive', type=int, default=int(env('SERVE_KEEPALIVE', 5)),
+                        help='Segundos que se mantiene abierta una conexión keep-alive')
+    parser.add_argument('--timeout', type=int, default=int(env('SERVE_TIMEOUT', 30)),
+                        help='Segundos sin respuesta antes de reiniciar un worker')
+    parser.add_argument('--graceful-timeout', type=int, default=int(env('SERVE_GRACEFUL_TIMEOUT', 30)),
+                        help='Segundos para terminar peticiones en curso al recargar o apagar')
+    parser.add_argument('--max-requests', type=int, default=int(env('SERVE_MAX_REQUESTS', 1000)),
+                        help='Peticiones antes de reciclar un worker (0 = nunca)')
+    parser.add_argument('--max-requests-jitter', type=int, default=int(env('SERVE_MAX_REQUESTS_JITTER', 100)),
+                        help='Variación aleatoria para que los workers no se reciclen a la vez')
+    parser.add_argument('--no-preload', dest='preload', action='store_false',
+                        default=env('SERVE_PRELOAD', '1') not in ('0', 'false', 'False'),
+                        help='Cargar la app en cada worker (permite recargar código con HUP)')
+    return parser.parse_args(argv)
+
+
+def post_fork(server, worker):
+    """Cada worker descarta las conexiones heredadas del maestro"""
+    app = worker.app.application
+    if app is None:
+        # Sin preload la app se crea dentro del worker: no hay nada heredado
+        return
+    with app.app_context():
+        # close=False: no cerrar sockets que el maestro o los hermanos aún usan
+        db.engine.dispose(close=False)
+        # Los motores de las réplicas también se crearon antes del fork
+        for engine in app.extensions.get('read_replicas') or ():
+            engine.dispose(close=False)
+    server.log.info('Worker %s listo (pools de conexiones reiniciados)', worker.pid)
+
+
+def post_worker_init(worker):
+    """Tareas de arranque de cada worker, con la app ya cargada"""
+    try:
+        from .services.images import requeue_stale
+        from .services.reset_tokens import start_sweeper
+    except ImportError:
+        from app.services.images import requeue_stale
+        from app.services.reset_tokens import start_sweeper
+    # Imágenes que un worker anterior dejó a medias (reciclado por max-requests)
+    requeue_stale(worker.wsgi)
+    # Hilo de limpieza de tokens: después del fork, nunca en el maestro
+    start_sweeper(worker.wsgi)
+
+
+def gunicorn_options(args):
+    return {
+        'bind': args.bind,
+        'workers': args.workers,
+        'worker_class': 'gthread',
+        'threads': args.threads,
+        'keepalive': args.keepalive,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests_jitter,
+        'preload_app': args.preload,
+        'post_fork': post_fork,
+        'post_worker_init': post_worker_init,
+        'accesslog': '-',
+        'errorlog': '-',
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit('❌ gunicorn no está instalado (pip install -r requirements.txt); '
+                         'en Windows usa python start.py para el servidor de desarrollo')
+
+    class QuadraServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            self.application = None
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            if self.application is None:
+                self.application = create_app()
+            return self.application
+
+    server = QuadraServer(gunicorn_options(args))
+    if args.preload:
+        init_db(server.load())
+    else:
+        init_db(create_app())
+
+    print(f"🚀 Iniciando QUADRA en {args.bind} ({args.workers} workers × {args.threads} hilos)")
+    server.run()
+
+
+if __name__ == '__main__':
+    main()
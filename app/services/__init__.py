@@ -0,0 +1 @@
+# Servicios de la aplicación (lógica compartida entre modelos, rutas y comandos)
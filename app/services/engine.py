@@ -0,0 +1,125 @@
+"""
+Perfiles del motor de base de datos.
+
+DB_PROFILE elige el perfil: 'auto' (según la URL), 'sqlite', 'postgres' o
+'none' (valores por defecto de SQLAlchemy).
+
+- sqlite: en cada conexión se aplican WAL (los lectores no esperan a los
+  escritores), synchronous=NORMAL, mmap_size, cache_size y busy_timeout.
+- postgres: tamaño y desborde del pool, pre-ping, reciclado de conexiones y
+  statement_timeout/lock_timeout por sesión.
+
+engine_options() se usa antes de db.init_app (SQLALCHEMY_ENGINE_OPTIONS) e
+install() después, para registrar los PRAGMA y leer la configuración efectiva;
+las réplicas de lectura (services/replicas.py) usan las mismas opciones.
+"""
+
+import logging
+
+from sqlalchemy import event, text
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NONE = 'none'
+PROFILE_SQLITE = 'sqlite'
+PROFILE_POSTGRES = 'postgres'
+
+
+def resolve_profile(config):
+    profile = config.get('DB_PROFILE', 'auto')
+    if profile != 'auto':
+        return profile
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite'):
+        return PROFILE_SQLITE
+    if uri.startswith('postgresql'):
+        return PROFILE_POSTGRES
+    return PROFILE_NONE
+
+
+def engine_options(config):
+    """Opciones de create_engine para el perfil configurado"""
+    profile = resolve_profile(config)
+    if profile == PROFILE_POSTGRES:
+        session_options = (
+            f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT']} "
+            f"-c lock_timeout={config['DB_LOCK_TIMEOUT']}"
+        )
+        return {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': True,
+            'connect_args': {'options': session_options},
+        }
+    if profile == PROFILE_SQLITE:
+        # El módulo sqlite3 espera este tiempo (en segundos) por un bloqueo
+        return {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000}}
+    return {}
+
+
+def _sqlite_pragmas(config):
+    return (
+        ('journal_mode', 'WAL'),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+        ('cache_size', config['SQLITE_CACHE_SIZE']),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT']),
+    )
+
+
+def apply_profile(engine, config):
+    """Registra los ajustes por conexión del perfil en un engine"""
+    if resolve_profile(config) != PROFILE_SQLITE:
+        return
+    pragmas = _sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def install(app):
+    """Aplica el perfil al engine principal y devuelve la configuración efectiva"""
+    profile = resolve_profile(app.config)
+    with app.app_context():
+        engine = db.engine
+        apply_profile(engine, app.config)
+
+        settings = {'profile': profile}
+        if profile == PROFILE_POSTGRES:
+            pool = engine.pool
+            settings.update(pool_size=pool.size(), max_overflow=pool._max_overflow,
+                            pool_recycle=pool._recycle, pool_pre_ping=pool._pre_ping)
+        try:
+            settings.update(effective_settings(engine, profile))
+        except Exception as e:
+            # Sin conexión todavía: se informa lo configurado y el motivo
+            settings['error'] = str(e).splitlines()[0]
+        logger.info('Motor de base de datos: %s', describe(settings))
+        app.extensions['db_engine_settings'] = settings
+        return settings
+
+
+def effective_settings(engine, profile):
+    """Lee de la base los valores que realmente quedaron aplicados"""
+    settings = {}
+    if profile == PROFILE_SQLITE:
+        with engine.connect() as connection:
+            for name in ('journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'busy_timeout'):
+                settings[name] = connection.execute(text(f'PRAGMA {name}')).scalar()
+    elif profile == PROFILE_POSTGRES:
+        with engine.connect() as connection:
+            for name in ('statement_timeout', 'lock_timeout'):
+                settings[name] = connection.execute(text(f'SHOW {name}')).scalar()
+    return settings
+
+
+def describe(settings):
+    return ', '.join(f'{key}={value}' for key, value in settings.items())
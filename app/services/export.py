@@ -0,0 +1,132 @@
+"""
+Exportación en streaming de puestos activos (GeoJSON o NDJSON).
+
+La consulta se recorre con yield_per (cursor del lado del servidor en
+PostgreSQL vía stream_results), así que la memoria no crece con el tamaño de
+la tabla: se serializa un lote de filas, se entrega y se descarta. La salida
+se agrupa en bloques de ~64 KiB y, opcionalmente, se comprime con gzip sobre
+la marcha. La usan /api/stands/export y `flask stands export`.
+
+- geojson: un FeatureCollection (Content-Type application/geo+json).
+- ndjson: un Feature por línea (GeoJSONSeq); `flask stands import` lee ambos.
+"""
+
+import json
+import zlib
+
+from app import db
+from app.models.food_stand import FoodStand
+from app.models.user import User
+from app.services.images import stand_image_url
+
+FORMATS = {
+    'geojson': 'application/geo+json',
+    'ndjson': 'application/x-ndjson',
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def export_query(state=None, municipality=None, bbox=None):
+    """Consulta proyectada de los puestos activos a exportar, en orden de id.
+
+    bbox es (south, west, north, east) y usa el mismo filtro por celdas
+    geohash que el mapa.
+    """
+    query = db.session.query(
+        FoodStand.id,
+        FoodStand.name,
+        FoodStand.description,
+        FoodStand.latitude,
+        FoodStand.longitude,
+        FoodStand.address,
+        FoodStand.neighborhood,
+        FoodStand.municipality,
+        FoodStand.state,
+        FoodStand.postal_code,
+        FoodStand.image_filename,
+        FoodStand.image_status,
+        FoodStand.rating_sum,
+        FoodStand.review_count,
+        FoodStand.created_at,
+        User.username.label('owner_username')
+    ).join(User, User.id == FoodStand.user_id)\
+     .filter(FoodStand.is_active == True)
+
+    if state:
+        query = query.filter(FoodStand.state == state)
+    if municipality:
+        query = query.filter(FoodStand.municipality == municipality)
+    if bbox:
+        query = FoodStand.filter_bbox(query, *bbox)
+    return query.order_by(FoodStand.id)
+
+
+def feature(row):
+    """Feature GeoJSON de una fila de export_query()"""
+    return {
+        'type': 'Feature',
+        'id': row.id,
+        'geometry': {'type': 'Point', 'coordinates': [row.longitude, row.latitude]},
+        'properties': {
+            'name': row.name,
+            'description': row.description,
+            'address': row.address,
+            'neighborhood': row.neighborhood,
+            'municipality': row.municipality,
+            'state': row.state,
+            'postal_code': row.postal_code,
+            'image_url': stand_image_url(row, 'detail'),
+            'average_rating': round(row.rating_sum / row.review_count, 2) if row.review_count else 0,
+            'total_reviews': row.review_count or 0,
+            'owner': row.owner_username,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+        },
+    }
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _pieces(query, fmt, batch_size):
+    """Fragmentos de texto del documento, fila por fila"""
+    rows = query.yield_per(batch_size)
+    if fmt == 'ndjson':
+        for row in rows:
+            yield _dumps(feature(row)) + '\n'
+        return
+
+    yield '{"type":"FeatureCollection","features":['
+    separator = ''
+    for row in rows:
+        yield separator + _dumps(feature(row))
+        separator = ',\n'
+    yield ']}\n'
+
+
+def stream(query, fmt='geojson', batch_size=1000, compress=False, level=6):
+    """Genera el documento en bloques de bytes (comprimidos con gzip si compress)"""
+    if fmt not in FORMATS:
+        raise ValueError(f'Formato de exportación desconocido: {fmt}')
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    buffer = []
+    size = 0
+    for piece in _pieces(query, fmt, batch_size):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            data = ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+            if compressor:
+                data = compressor.compress(data)
+                if not data:
+                    continue
+            yield data
+
+    data = ''.join(buffer).encode('utf-8')
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
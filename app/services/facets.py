@@ -0,0 +1,101 @@
+"""
+Caché de facetas (municipios y estados con su cantidad de puestos activos).
+
+Los filtros del dashboard y de la API solo cambian cuando se crean, editan o
+eliminan puestos, así que se calculan una vez con GROUP BY y se guardan en
+memoria. La caché se invalida al confirmar (commit) una transacción que
+escribió puestos; el TTL acota cuánto tarda en verse un cambio hecho por otro
+proceso.
+"""
+
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+
+from app import db
+from app.models.food_stand import FoodStand
+
+FACETS = ('municipality', 'state')
+DEFAULT_TTL = 300
+
+
+class FacetCache:
+    """Valores distintos de cada faceta con su conteo, compartidos por el proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._facets = None
+        self._loaded_at = 0.0
+
+    def _ttl(self):
+        if has_app_context():
+            return current_app.config.get('FACET_CACHE_TTL', DEFAULT_TTL)
+        return DEFAULT_TTL
+
+    def _load(self):
+        facets = {}
+        for name in FACETS:
+            column = getattr(FoodStand, name)
+            rows = db.session.query(column, func.count(FoodStand.id))\
+                .filter(column.isnot(None), column != '', FoodStand.is_active == True)\
+                .group_by(column)\
+                .order_by(column)\
+                .all()
+            facets[name] = [(value, count) for value, count in rows]
+        return facets
+
+    def get(self):
+        """Devuelve {faceta: [(valor, cantidad), ...]} ordenado por valor"""
+        with self._lock:
+            if self._facets is not None and time.monotonic() - self._loaded_at < self._ttl():
+                return self._facets
+
+        facets = self._load()
+        with self._lock:
+            self._facets = facets
+            self._loaded_at = time.monotonic()
+        return facets
+
+    def values(self, name):
+        """Solo los valores de una faceta (para listas desplegables)"""
+        return [value for value, _ in self.get()[name]]
+
+    def invalidate(self):
+        with self._lock:
+            self._facets = None
+
+
+facet_cache = FacetCache()
+
+
+def _mark_dirty(target):
+    session = object_session(target)
+    if session is not None:
+        session.info['facets_dirty'] = True
+
+
+@event.listens_for(FoodStand, 'after_insert')
+@event.listens_for(FoodStand, 'after_delete')
+def _stand_written(mapper, connection, target):
+    _mark_dirty(target)
+
+
+@event.listens_for(FoodStand, 'after_update')
+def _stand_updated(mapper, connection, target):
+    if any(get_history(target, name).has_changes() for name in FACETS + ('is_active',)):
+        _mark_dirty(target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('facets_dirty', False):
+        facet_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('facets_dirty', None)
@@ -0,0 +1,197 @@
+"""
+Utilidades geoespaciales para QUADRA: codificación geohash, cálculo de
+celdas candidatas para búsquedas por radio y distancias Haversine por lotes.
+"""
+
+import math
+
+# NumPy es opcional y se importa al primer cálculo por lotes (ver numpy_module)
+_numpy = None
+
+EARTH_RADIUS_KM = 6371
+
+# Precisión almacenada en food_stands.geohash (~4.8m x 4.8m por celda)
+GEOHASH_PRECISION = 9
+
+# Número máximo de celdas que se consultan en una búsqueda por radio
+MAX_CANDIDATE_CELLS = 16
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Codifica una coordenada como geohash de la precisión indicada"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits = bits << 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits = bits << 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            geohash.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+
+def cell_size(precision):
+    """Devuelve (alto, ancho) en grados de una celda geohash"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Calcula la caja (sur, oeste, norte, este) que contiene el círculo dado"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6:
+        dlng = 180.0
+    else:
+        dlng = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+
+    return (max(latitude - dlat, -90.0),
+            max(longitude - dlng, -180.0),
+            min(latitude + dlat, 90.0),
+            min(longitude + dlng, 180.0))
+
+
+def _steps(start, end, step):
+    """Puntos de muestreo entre start y end (inclusive) separados por step"""
+    value = start
+    while value < end:
+        yield value
+        value += step
+    yield end
+
+
+def covering_cells(south, west, north, east, max_cells=MAX_CANDIDATE_CELLS):
+    """Prefijos geohash que cubren la caja usando la mayor precisión posible
+    sin superar max_cells celdas."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.ceil((north - south) / height) + 1
+        cols = math.ceil((east - west) / width) + 1
+        if rows * cols <= max_cells:
+            break
+
+    cells = set()
+    for lat in _steps(south, north, height):
+        for lng in _steps(west, east, width):
+            cells.add(encode_geohash(lat, lng, precision))
+    return sorted(cells)
+
+
+def cluster_precision(zoom, cluster_pixels=60):
+    """Precisión geohash cuyas celdas miden al menos cluster_pixels en pantalla
+    para el nivel de zoom dado (teselas de 256px)."""
+    min_width = 360.0 / (2 ** zoom) * cluster_pixels / 256
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if cell_size(precision)[1] >= min_width:
+            return precision
+    return 1
+
+
+def prefix_upper_bound(prefix):
+    """Menor cadena mayor que todas las que empiezan por prefix (orden base32).
+
+    Permite expresar "geohash LIKE 'prefix%'" como un rango que usa el índice.
+    Devuelve None si no existe cota superior (prefijo formado solo por 'z').
+    """
+    chars = list(prefix)
+    while chars:
+        position = _BASE32.index(chars[-1])
+        if position + 1 < len(_BASE32):
+            chars[-1] = _BASE32[position + 1]
+            return ''.join(chars)
+        chars.pop()
+    return None
+
+
+def numpy_module():
+    """Módulo numpy, importado al primer uso; None si no está instalado"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - NumPy es opcional
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def haversine_batch(latitude, longitude, latitudes, longitudes):
+    """Distancias en km desde (latitude, longitude) a cada par de los arreglos.
+
+    Usa NumPy para calcular todo el lote en una sola pasada; si NumPy no está
+    disponible recurre a un bucle con math.
+    """
+    np = numpy_module()
+    if np is None:
+        lat1 = math.radians(latitude)
+        cos_lat1 = math.cos(lat1)
+        distances = []
+        for lat, lng in zip(latitudes, longitudes):
+            lat2 = math.radians(lat)
+            dlat = lat2 - lat1
+            dlon = math.radians(lng - longitude)
+            a = math.sin(dlat / 2) ** 2 + cos_lat1 * math.cos(lat2) * math.sin(dlon / 2) ** 2
+            distances.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a)))
+        return distances
+
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearest_within(items, latitude, longitude, radius_km=None):
+    """Filtra items (objetos con latitude/longitude) por radio y los ordena del
+    más cercano al más lejano. Devuelve una lista de tuplas (item, distancia_km).
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    distances = haversine_batch(
+        latitude, longitude,
+        [item.latitude for item in items],
+        [item.longitude for item in items]
+    )
+
+    np = numpy_module()
+    if np is None:
+        order = sorted(range(len(items)), key=distances.__getitem__)
+        if radius_km is not None:
+            order = [i for i in order if distances[i] <= radius_km]
+        return [(items[i], distances[i]) for i in order]
+
+    order = np.argsort(distances, kind='stable')
+    if radius_km is not None:
+        order = order[distances[order] <= radius_km]
+    return [(items[i], float(distances[i])) for i in order]
@@ -0,0 +1,202 @@
+"""
+Caché en proceso de la identidad del usuario autenticado.
+
+El user_loader de Flask-Login se ejecuta en cada petición autenticada. En vez
+de cargar el User completo cada vez, se guarda un CachedUser (id, username,
+email, is_active y generación de contraseña) en una caché LRU con TTL.
+
+La generación de contraseña viaja en el id de sesión ('<id>:<generación>'):
+al cambiar o restablecer la contraseña sube la generación y las sesiones
+emitidas antes dejan de ser válidas. Los cambios de contraseña o de is_active
+invalidan la entrada al confirmar la transacción. Otros procesos (o una
+réplica atrasada) pueden tener todavía la generación anterior: si llega una
+sesión con una generación mayor que la guardada, se relee el usuario del
+primario en lugar de rechazarla, y desde ese momento las sesiones viejas se
+rechazan también en ese proceso.
+
+Los ids de sesión anteriores ('<id>', p. ej. cookies "recordarme" de hasta un
+año) solo se aceptan si la contraseña no ha cambiado nunca (generación 0 en el
+primario); en ese caso se reemiten con la generación y, si no, se rechazan.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context, has_request_context, request, session
+from flask_login import UserMixin
+from flask_login.config import COOKIE_NAME
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+
+from app import db
+from app.models.user import User, session_id
+
+DEFAULT_TTL = 60
+DEFAULT_SIZE = 1024
+
+
+class CachedUser(UserMixin):
+    """Identidad de solo lectura para current_user"""
+
+    __slots__ = ('id', 'username', 'email', 'active', 'password_generation')
+
+    def __init__(self, id, username, email, active, password_generation):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.active = active
+        self.password_generation = password_generation
+
+    @property
+    def is_active(self):
+        return bool(self.active)
+
+    def get_id(self):
+        return session_id(self.id, self.password_generation)
+
+    def load(self):
+        """User completo (para cambiar contraseña u otras escrituras)"""
+        return db.session.get(User, self.id)
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+
+def parse_session_id(value):
+    """'12:3' -> (12, 3); los ids de sesiones anteriores ('12') -> (12, None)"""
+    user_id, _, generation = str(value).partition(':')
+    return int(user_id), (int(generation) if generation else None)
+
+
+class IdentityCache:
+    """LRU con TTL de CachedUser por id, compartida por los hilos del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _config(self, name, default):
+        if has_app_context():
+            return current_app.config.get(name, default)
+        return default
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            identity, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return identity
+
+    def put(self, identity):
+        ttl = self._config('USER_CACHE_TTL', DEFAULT_TTL)
+        size = self._config('USER_CACHE_SIZE', DEFAULT_SIZE)
+        with self._lock:
+            self._entries[identity.id] = (identity, time.monotonic() + ttl)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+identity_cache = IdentityCache()
+
+
+def _fetch_identity(user_id, primary=False):
+    """CachedUser leído de la base (del primario con primary=True), o None"""
+    query = select(
+        User.id, User.username, User.email, User.is_active, User.password_generation
+    ).where(User.id == user_id)
+    if primary:
+        with db.engine.connect() as connection:
+            row = connection.execute(query).first()
+    else:
+        row = db.session.execute(query).first()
+    return CachedUser(*row) if row is not None else None
+
+
+def _reissue_session(identity):
+    """Reescribe un id de sesión anterior con la generación (y la cookie "recordarme")"""
+    if not has_request_context():
+        return
+    session['_user_id'] = identity.get_id()
+    if request.cookies.get(current_app.config.get('REMEMBER_COOKIE_NAME', COOKIE_NAME)):
+        session['_remember'] = 'set'
+
+
+def load_identity(value):
+    """user_loader: CachedUser para un id de sesión, o None si ya no es válido"""
+    user_id, generation = parse_session_id(value)
+    if generation is None:
+        # Id sin generación: la caché o la réplica podrían no tener todavía un
+        # cambio de contraseña reciente, así que se decide con el primario
+        identity = _fetch_identity(user_id, primary=True)
+        if identity is None:
+            identity_cache.invalidate(user_id)
+            return None
+        identity_cache.put(identity)
+        if identity.password_generation or 0:
+            # La contraseña cambió después de emitir la sesión
+            return None
+        _reissue_session(identity)
+        return identity
+
+    identity = identity_cache.get(user_id)
+    if identity is None:
+        identity = _fetch_identity(user_id)
+        if identity is None:
+            return None
+        identity_cache.put(identity)
+
+    if generation > (identity.password_generation or 0):
+        # Sesión más nueva que la caché de este proceso o que la réplica:
+        # la contraseña cambió en otro lado, se relee del primario
+        identity = _fetch_identity(user_id, primary=True)
+        if identity is None:
+            identity_cache.invalidate(user_id)
+            return None
+        identity_cache.put(identity)
+
+    if generation != (identity.password_generation or 0):
+        # La sesión es anterior al último cambio de contraseña
+        return None
+    return identity
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    if any(get_history(target, name).has_changes()
+           for name in ('password_generation', 'is_active', 'username', 'email')):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault('stale_identities', set()).add(target.id)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('stale_identities', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop('stale_identities', ()):
+        identity_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('stale_identities', None)
@@ -0,0 +1,217 @@
+"""
+Procesamiento de imágenes de puestos fuera del hilo de la petición.
+
+create_stand guarda el archivo original (services/storage.py) y encola su
+procesamiento en un pool de hilos; el puesto queda con image_status='processing' hasta que se generan
+las versiones (renditions) en JPEG y WebP:
+
+- thumb:    tarjetas de listados y dashboard
+- detail:   página de detalle del puesto
+- original: la foto completa acotada a ORIGINAL_MAX_SIZE
+
+El archivo subido queda intacto (su nombre es el hash de su contenido) y solo
+sirve de fuente para las versiones; nunca se entrega tal cual.
+
+image_status es None para puestos anteriores al pipeline, que solo tienen el
+archivo original. Si un worker muere a mitad del procesamiento el puesto queda
+en 'processing'; requeue_stale (al arrancar cada worker de gunicorn y con
+`flask images requeue`) los vuelve a encolar.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import url_for
+from sqlalchemy import select, update
+
+from app import db
+from app.services.storage import CONTENT_ADDRESSED_NAME, get_storage, store_file
+
+logger = logging.getLogger(__name__)
+
+STATUS_PROCESSING = 'processing'
+STATUS_READY = 'ready'
+STATUS_FAILED = 'failed'
+
+ORIGINAL_MAX_SIZE = (1600, 1200)
+
+RENDITIONS = {
+    'thumb': (480, 360),
+    'detail': (1200, 900),
+    'original': ORIGINAL_MAX_SIZE,
+}
+
+FORMATS = {
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def resize_image(image_path, max_size=(800, 600)):
+    """Redimensiona imagen para optimizar almacenamiento"""
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        img.save(image_path, optimize=True, quality=85)
+
+
+def rendition_filename(image_filename, rendition, fmt='jpg'):
+    """Nombre de archivo de una versión: <nombre>_<rendition>.<fmt>"""
+    stem, _ = os.path.splitext(image_filename)
+    return f'{stem}_{rendition}.{fmt}'
+
+
+def stand_image_url(stand, rendition='thumb', fmt='jpg'):
+    """URL de la imagen de un puesto en el tamaño pedido.
+
+    Devuelve None si no hay imagen o si todavía se está procesando (la
+    plantilla muestra un marcador). Para puestos sin versiones (anteriores al
+    pipeline) devuelve el original en JPEG y None en WebP; una subida cuyo
+    procesamiento falló no tiene nada que mostrar.
+    """
+    if not stand.image_filename:
+        return None
+
+    status = getattr(stand, 'image_status', None)
+    if status == STATUS_READY:
+        filename = rendition_filename(stand.image_filename, rendition, fmt)
+    elif status is None or status == STATUS_FAILED:
+        if fmt != 'jpg' or CONTENT_ADDRESSED_NAME.match(stand.image_filename):
+            return None
+        filename = stand.image_filename
+    else:
+        return None
+
+    return url_for('uploaded_file', filename=filename)
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('IMAGE_WORKERS', 2),
+                thread_name_prefix='quadra-images'
+            )
+        return _executor
+
+
+def generate_renditions(storage, image_filename):
+    """Genera las versiones que falten de una imagen; devuelve los nombres creados.
+
+    Los nombres derivan del hash del original, así que una foto repetida
+    reutiliza las versiones ya guardadas.
+    """
+    pending = [
+        (rendition, size, fmt, rendition_filename(image_filename, rendition, fmt))
+        for rendition, size in RENDITIONS.items()
+        for fmt in FORMATS
+    ]
+    pending = [item for item in pending if not storage.exists(item[3])]
+    if not pending:
+        return []
+
+    # Pillow se importa aquí para no cargarlo al arrancar la app
+    from PIL import Image, ImageOps
+
+    created = []
+    with storage.open(image_filename) as source, Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        resized = {}
+        for rendition, size, fmt, filename in pending:
+            if rendition not in resized:
+                resized[rendition] = image.copy()
+                resized[rendition].thumbnail(size, Image.Resampling.LANCZOS)
+            handle, temp_path = tempfile.mkstemp(prefix='.rendition-', dir=storage.temp_dir())
+            try:
+                with os.fdopen(handle, 'wb') as temp_file:
+                    resized[rendition].save(temp_file, **FORMATS[fmt])
+                store_file(storage, filename, temp_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            created.append(filename)
+    return created
+
+
+def _set_status(stand_id, status):
+    from app.models.food_stand import FoodStand
+    from app.services import versioning
+
+    stands = FoodStand.__table__
+    with db.engine.begin() as connection:
+        connection.execute(update(stands).where(stands.c.id == stand_id).values(image_status=status))
+        # Las páginas con ETag deben mostrar la imagen nueva
+        versioning.bump(connection)
+
+
+def _process(app, stand_id, image_filename):
+    with app.app_context():
+        try:
+            generate_renditions(get_storage(app), image_filename)
+        except Exception:
+            logger.exception('Error al procesar la imagen %s del puesto %s', image_filename, stand_id)
+            _set_status(stand_id, STATUS_FAILED)
+            return
+        _set_status(stand_id, STATUS_READY)
+
+
+def process_stand_image(app, stand_id, image_filename):
+    """Encola la generación de versiones de la imagen de un puesto"""
+    return _get_executor(app).submit(_process, app, stand_id, image_filename)
+
+
+def requeue_stale(app, older_than=None):
+    """Vuelve a encolar los puestos que llevan más de older_than segundos en 'processing'.
+
+    Cada fila se reclama moviendo su updated_at antes de encolarla, así que si
+    varios workers barren a la vez solo uno la procesa. Devuelve los futures.
+    """
+    from app.models.food_stand import FoodStand
+
+    stands = FoodStand.__table__
+    if older_than is None:
+        older_than = app.config.get('IMAGE_STALE_SECONDS', 600)
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    stale = (stands.c.image_status == STATUS_PROCESSING, stands.c.updated_at < cutoff)
+
+    futures = []
+    with app.app_context():
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                select(stands.c.id, stands.c.image_filename).where(*stale)
+            ).all()
+        for row in rows:
+            with db.engine.begin() as connection:
+                claimed = connection.execute(
+                    update(stands).where(stands.c.id == row.id, *stale)
+                    .values(updated_at=datetime.utcnow())
+                ).rowcount
+            if claimed:
+                futures.append(process_stand_image(app, row.id, row.image_filename))
+    return futures
+
+
+def backfill_renditions(app):
+    """Encola los puestos listos para generar las versiones que les falten (p. ej. una nueva)"""
+    from app.models.food_stand import FoodStand
+
+    stands = FoodStand.__table__
+    with app.app_context():
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                select(stands.c.id, stands.c.image_filename).where(stands.c.image_status == STATUS_READY)
+            ).all()
+    return [process_stand_image(app, row.id, row.image_filename) for row in rows]
@@ -0,0 +1,206 @@
+"""
+Tablas de clasificación de puestos mejor calificados.
+
+Cada puesto guarda un promedio bayesiano (bayesian_score) que combina su
+calificación con una calificación a priori, de modo que un puesto con una sola
+reseña de 5 estrellas no supera a uno con cientos de reseñas altas. Para cada
+ámbito (global, estado y municipio) se guarda el top-K en leaderboard_entries,
+que se refresca de forma incremental al escribir reseñas o puestos.
+
+El refresco de un ámbito lee el top-K y lo reescribe, así que se serializa
+por ámbito: en PostgreSQL con un advisory lock de transacción; en SQLite la
+transacción que escribe ya tiene el único lock de escritura. Tras una reseña
+el refresco se omite si el puesto no está en la tabla y su puntaje no alcanza
+al último, para no reescribir (ni retener) la tabla global en cada reseña.
+"""
+
+import hashlib
+
+from flask import current_app, has_app_context
+from sqlalchemy import select, delete, update, insert, distinct, bindparam, func, case
+
+from app.models.food_stand import FoodStand
+from app.models.leaderboard import LeaderboardEntry
+
+SCOPE_GLOBAL = 'global'
+SCOPE_STATE = 'state'
+SCOPE_MUNICIPALITY = 'municipality'
+
+DEFAULT_PRIOR_MEAN = 3.0
+DEFAULT_PRIOR_WEIGHT = 5.0
+DEFAULT_SIZE = 20
+
+
+def _setting(name, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def prior():
+    """Devuelve (media a priori, peso a priori) configurados"""
+    return (float(_setting('LEADERBOARD_PRIOR_MEAN', DEFAULT_PRIOR_MEAN)),
+            float(_setting('LEADERBOARD_PRIOR_WEIGHT', DEFAULT_PRIOR_WEIGHT)))
+
+
+def bayesian_score(rating_sum, review_count):
+    """Promedio bayesiano: (C*m + suma) / (C + n)"""
+    mean, weight = prior()
+    return (weight * mean + (rating_sum or 0)) / (weight + (review_count or 0))
+
+
+def score_update_values(rating_delta=0, count_delta=0):
+    """Valores para un UPDATE atómico que aplica un delta a los agregados y
+    recalcula el puntaje bayesiano en la misma sentencia."""
+    mean, weight = prior()
+    stands = FoodStand.__table__
+    return {
+        'rating_sum': stands.c.rating_sum + rating_delta,
+        'review_count': stands.c.review_count + count_delta,
+        'bayesian_score': (weight * mean + stands.c.rating_sum + rating_delta)
+                          / (weight + stands.c.review_count + count_delta),
+    }
+
+
+def _scope_filter(scope, value):
+    stands = FoodStand.__table__
+    if scope == SCOPE_STATE:
+        return stands.c.state == value
+    if scope == SCOPE_MUNICIPALITY:
+        return stands.c.municipality == value
+    return None
+
+
+def _lock_scope(connection, scope, value):
+    """Serializa los refrescos de un ámbito hasta el fin de la transacción"""
+    if connection.dialect.name != 'postgresql':
+        return
+    digest = hashlib.blake2b(f'leaderboard:{scope}:{value}'.encode(), digest_size=8).digest()
+    connection.execute(select(func.pg_advisory_xact_lock(int.from_bytes(digest, 'big', signed=True))))
+
+
+def _may_change(connection, scope, value, food_stand_id):
+    """False si el puesto no puede entrar ni moverse en el top-K del ámbito"""
+    stands = FoodStand.__table__
+    entries = LeaderboardEntry.__table__
+    count, lowest, listed = connection.execute(
+        select(func.count(), func.min(entries.c.score),
+               func.max(case((entries.c.food_stand_id == food_stand_id, 1), else_=0)))
+        .where(entries.c.scope == scope, entries.c.scope_value == value)
+    ).one()
+    if listed or count < int(_setting('LEADERBOARD_SIZE', DEFAULT_SIZE)):
+        return True
+    row = connection.execute(
+        select(stands.c.bayesian_score, stands.c.is_active).where(stands.c.id == food_stand_id)
+    ).first()
+    return row is not None and bool(row.is_active) and (row.bayesian_score or 0) >= lowest
+
+
+def refresh_scope(connection, scope, value='', food_stand_id=None):
+    """Recalcula el top-K de un ámbito con una consulta ordenada por índice.
+
+    Las posiciones se actualizan en su lugar y solo se escriben las que
+    cambiaron, así que una reseña normalmente toca una o dos filas. Con
+    food_stand_id (el único puesto que cambió) se omite si no puede afectar
+    la tabla.
+    """
+    stands = FoodStand.__table__
+    entries = LeaderboardEntry.__table__
+    value = value or ''
+
+    _lock_scope(connection, scope, value)
+    if food_stand_id is not None and not _may_change(connection, scope, value, food_stand_id):
+        return
+
+    query = select(stands.c.id, stands.c.bayesian_score)\
+        .where(stands.c.is_active == True)\
+        .order_by(stands.c.bayesian_score.desc(), stands.c.review_count.desc(), stands.c.id)\
+        .limit(int(_setting('LEADERBOARD_SIZE', DEFAULT_SIZE)))
+    scope_filter = _scope_filter(scope, value)
+    if scope_filter is not None:
+        query = query.where(scope_filter)
+
+    ranking = [(stand_id, score) for stand_id, score in connection.execute(query)]
+    in_scope = (entries.c.scope == scope) & (entries.c.scope_value == value)
+    current = {
+        rank: (stand_id, score)
+        for rank, stand_id, score in connection.execute(
+            select(entries.c.rank, entries.c.food_stand_id, entries.c.score).where(in_scope))
+    }
+
+    changed = []
+    added = []
+    for rank, (stand_id, score) in enumerate(ranking, start=1):
+        if rank not in current:
+            added.append({'scope': scope, 'scope_value': value, 'rank': rank,
+                          'score': score, 'food_stand_id': stand_id})
+        elif current[rank] != (stand_id, score):
+            changed.append({'b_rank': rank, 'score': score, 'food_stand_id': stand_id})
+
+    if changed:
+        connection.execute(
+            update(entries).where(in_scope, entries.c.rank == bindparam('b_rank')),
+            changed
+        )
+    if added:
+        connection.execute(insert(entries), added)
+    if any(rank > len(ranking) for rank in current):
+        connection.execute(delete(entries).where(in_scope, entries.c.rank > len(ranking)))
+
+
+def refresh_for_location(connection, state=None, municipality=None, food_stand_id=None):
+    """Refresca las tablas global, del estado y del municipio dados"""
+    refresh_scope(connection, SCOPE_GLOBAL, food_stand_id=food_stand_id)
+    if state:
+        refresh_scope(connection, SCOPE_STATE, state, food_stand_id=food_stand_id)
+    if municipality:
+        refresh_scope(connection, SCOPE_MUNICIPALITY, municipality, food_stand_id=food_stand_id)
+
+
+def refresh_locations(connection, locations):
+    """Refresca una vez cada ámbito tocado por varias ubicaciones (estado, municipio)"""
+    refresh_scope(connection, SCOPE_GLOBAL)
+    for state in sorted({state for state, _ in locations if state}):
+        refresh_scope(connection, SCOPE_STATE, state)
+    for municipality in sorted({municipality for _, municipality in locations if municipality}):
+        refresh_scope(connection, SCOPE_MUNICIPALITY, municipality)
+
+
+def refresh_for_stand(connection, food_stand_id):
+    """Refresca las tablas en las que participa un puesto (solo cambió su puntaje)"""
+    stands = FoodStand.__table__
+    row = connection.execute(
+        select(stands.c.state, stands.c.municipality).where(stands.c.id == food_stand_id)
+    ).first()
+    if row is not None:
+        refresh_for_location(connection, row.state, row.municipality, food_stand_id=food_stand_id)
+
+
+def rebuild(connection):
+    """Recalcula todos los puntajes y todas las tablas (p. ej. al cambiar el a priori)"""
+    mean, weight = prior()
+    stands = FoodStand.__table__
+    entries = LeaderboardEntry.__table__
+
+    connection.execute(update(stands).values(
+        bayesian_score=(weight * mean + stands.c.rating_sum) / (weight + stands.c.review_count)
+    ))
+    connection.execute(delete(entries))
+
+    refresh_scope(connection, SCOPE_GLOBAL)
+    for (state,) in connection.execute(select(distinct(stands.c.state)).where(stands.c.state.isnot(None))):
+        refresh_scope(connection, SCOPE_STATE, state)
+    for (municipality,) in connection.execute(
+            select(distinct(stands.c.municipality)).where(stands.c.municipality.isnot(None))):
+        refresh_scope(connection, SCOPE_MUNICIPALITY, municipality)
+
+
+def top_rated(scope=SCOPE_GLOBAL, value='', limit=6):
+    """Puestos mejor calificados de un ámbito leyendo la tabla precalculada"""
+    return FoodStand.query\
+        .join(LeaderboardEntry, LeaderboardEntry.food_stand_id == FoodStand.id)\
+        .filter(LeaderboardEntry.scope == scope,
+                LeaderboardEntry.scope_value == (value or ''))\
+        .order_by(LeaderboardEntry.rank)\
+        .limit(limit)\
+        .all()
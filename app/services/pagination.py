@@ -0,0 +1,99 @@
+"""
+Paginación por cursor (keyset) ordenada por (created_at, id) descendente.
+
+A diferencia de OFFSET, cada página filtra a partir de la clave de la última
+fila vista, así que una página profunda cuesta lo mismo que la primera y no se
+necesita un COUNT(*). Los cursores son opacos para el cliente: codifican la
+clave de la fila límite y la dirección en base64.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+NEXT = 'n'
+PREV = 'p'
+
+
+def encode_cursor(item, direction):
+    """Codifica la clave (created_at, id) de un elemento como cursor opaco"""
+    payload = json.dumps([direction, item.created_at.isoformat(), item.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decodifica un cursor; devuelve (dirección, created_at, id) o None si es inválido"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, created_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in (NEXT, PREV):
+            return None
+        return direction, datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+class KeysetPage:
+    """Página de resultados con cursores hacia la siguiente y la anterior"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def keyset_paginate(query, created_column, id_column, cursor=None, per_page=12):
+    """Pagina una consulta (más recientes primero) a partir de un cursor.
+
+    Los elementos devueltos deben exponer atributos created_at e id.
+    """
+    decoded = decode_cursor(cursor)
+
+    if decoded is None:
+        rows = query.order_by(created_column.desc(), id_column.desc()).limit(per_page + 1).all()
+        items = rows[:per_page]
+        next_cursor = encode_cursor(items[-1], NEXT) if len(rows) > per_page else None
+        return KeysetPage(items, next_cursor=next_cursor)
+
+    direction, created_at, item_id = decoded
+
+    if direction == NEXT:
+        rows = query.filter(or_(created_column < created_at,
+                                and_(created_column == created_at, id_column < item_id)))\
+                    .order_by(created_column.desc(), id_column.desc())\
+                    .limit(per_page + 1).all()
+        items = rows[:per_page]
+        next_cursor = encode_cursor(items[-1], NEXT) if len(rows) > per_page else None
+        prev_cursor = encode_cursor(items[0], PREV) if items else None
+        return KeysetPage(items, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+    rows = query.filter(or_(created_column > created_at,
+                            and_(created_column == created_at, id_column > item_id)))\
+                .order_by(created_column.asc(), id_column.asc())\
+                .limit(per_page + 1).all()
+    items = list(reversed(rows[:per_page]))
+    prev_cursor = encode_cursor(items[0], PREV) if len(rows) > per_page else None
+    next_cursor = encode_cursor(items[-1], NEXT) if items else None
+    return KeysetPage(items, next_cursor=next_cursor, prev_cursor=prev_cursor)
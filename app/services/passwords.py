@@ -0,0 +1,107 @@
+"""
+Política de hash de contraseñas.
+
+PASSWORD_HASH_METHOD usa la notación de werkzeug con el factor de trabajo
+explícito ('scrypt:<n>:<r>:<p>' o 'pbkdf2:<hash>:<iteraciones>'). Los hashes
+hechos con otra política se actualizan al iniciar sesión (User.rehash_if_needed).
+
+Con PASSWORD_HASH_WORKERS > 0 las verificaciones se ejecutan en un pool de
+hilos de ese tamaño: una ráfaga de logins hace cola en lugar de ocupar todos
+los hilos del worker calculando hashes a la vez. Con 0 se verifica en línea.
+"""
+
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def current_method():
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+    return DEFAULT_METHOD
+
+
+@lru_cache(maxsize=None)
+def _method_prefix(method):
+    """Prefijo completo ('scrypt:32768:8:1') que werkzeug escribe para un método"""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def hash_password(password, method=None):
+    return generate_password_hash(password, method or current_method())
+
+
+def needs_rehash(password_hash, method=None):
+    """True si el hash se hizo con otro algoritmo o factor de trabajo"""
+    return password_hash.split('$', 1)[0] != _method_prefix(method or current_method())
+
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='quadra-passwords')
+        return _executor
+
+
+def verify_password(password_hash, password):
+    """Verifica una contraseña, en el pool acotado si está configurado"""
+    workers = current_app.config.get('PASSWORD_HASH_WORKERS', 0) if has_app_context() else 0
+    if not workers:
+        return check_password_hash(password_hash, password)
+    return _get_executor(workers).submit(check_password_hash, password_hash, password).result()
+
+
+def _time_method(method, samples):
+    password_hash = generate_password_hash('calibración', method)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        check_password_hash(password_hash, 'calibración')
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def calibrate(algorithm='scrypt', target_ms=250, samples=3):
+    """Busca el mayor factor de trabajo cuya verificación no pase de target_ms.
+
+    Devuelve una lista de (método, ms) medidos y el método elegido.
+    """
+    target = target_ms / 1000
+    measured = []
+
+    if algorithm == 'scrypt':
+        # n debe ser potencia de 2; se duplica hasta pasarse del objetivo
+        chosen = None
+        n = 2 ** 12
+        while n <= 2 ** 20:
+            method = f'scrypt:{n}:8:1'
+            elapsed = _time_method(method, samples)
+            measured.append((method, elapsed * 1000))
+            if elapsed > target:
+                break
+            chosen = method
+            n *= 2
+        return measured, chosen or measured[0][0]
+
+    if algorithm == 'pbkdf2':
+        # El costo es lineal en las iteraciones: se mide una base y se escala
+        base = 100000
+        elapsed = _time_method(f'pbkdf2:sha256:{base}', samples)
+        measured.append((f'pbkdf2:sha256:{base}', elapsed * 1000))
+        iterations = max(base, int(base * target / elapsed) // 10000 * 10000)
+        chosen = f'pbkdf2:sha256:{iterations}'
+        measured.append((chosen, _time_method(chosen, samples) * 1000))
+        return measured, chosen
+
+    raise ValueError(f'Algoritmo no soportado: {algorithm}')
@@ -0,0 +1,165 @@
+"""
+Proyecciones de lectura de puestos.
+
+Las vistas de mapa y listado solo necesitan unos pocos campos de cada puesto y
+el nombre del dueño. En lugar de cargar objetos FoodStand completos (y disparar
+una consulta perezosa por dueño), se hace una sola consulta con JOIN que solo
+selecciona esas columnas y se envuelve cada fila en un StandSummary ligero.
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event, func, case
+
+from app import db
+from app.models.food_stand import FoodStand
+from app.models.user import User
+from app.services.images import stand_image_url
+
+DESCRIPTION_PREVIEW = 100
+
+
+class StandSummary:
+    """Registro de solo lectura con los datos de un puesto para mapa y listados"""
+
+    __slots__ = ('id', 'name', 'description', 'latitude', 'longitude', 'address',
+                 'image_filename', 'image_status', 'municipality', 'state', 'owner_username',
+                 'rating_sum', 'review_count', 'created_at')
+
+    def __init__(self, row):
+        for name in self.__slots__:
+            setattr(self, name, getattr(row, name))
+        if self.description and len(self.description) > DESCRIPTION_PREVIEW:
+            self.description = self.description[:DESCRIPTION_PREVIEW] + '...'
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return 0
+        return self.rating_sum / self.review_count
+
+    @property
+    def total_reviews(self):
+        return self.review_count or 0
+
+    def to_dict(self):
+        """Datos serializables para el mapa y la API"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'address': self.address,
+            'image_filename': self.image_filename,
+            'image_url': stand_image_url(self, 'thumb'),
+            'average_rating': round(self.average_rating, 1),
+            'total_reviews': self.total_reviews,
+            'owner': self.owner_username,
+            'created_at': self.created_at.strftime('%d/%m/%Y') if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<StandSummary {self.name}>'
+
+
+def stand_summary_query():
+    """Consulta proyectada de puestos activos con el nombre de su dueño.
+
+    Devuelve un Query al que se le pueden aplicar filtros, orden y paginación;
+    la descripción se recorta en SQL para no transferir textos largos.
+    """
+    return db.session.query(
+        FoodStand.id,
+        FoodStand.name,
+        func.substr(FoodStand.description, 1, DESCRIPTION_PREVIEW + 1).label('description'),
+        FoodStand.latitude,
+        FoodStand.longitude,
+        FoodStand.address,
+        FoodStand.image_filename,
+        FoodStand.image_status,
+        FoodStand.municipality,
+        FoodStand.state,
+        User.username.label('owner_username'),
+        FoodStand.rating_sum,
+        FoodStand.review_count,
+        FoodStand.created_at
+    ).join(User, User.id == FoodStand.user_id)\
+     .filter(FoodStand.is_active == True)
+
+
+def stand_clusters(south, west, north, east, precision):
+    """Agrupa los puestos activos de la caja por celda geohash en SQL.
+
+    Devuelve una lista de diccionarios con cantidad, centroide y calificación
+    promedio de cada grupo.
+    """
+    cell = func.substr(FoodStand.geohash, 1, precision)
+    query = db.session.query(
+        cell.label('cell'),
+        func.count(FoodStand.id).label('count'),
+        func.avg(FoodStand.latitude).label('latitude'),
+        func.avg(FoodStand.longitude).label('longitude'),
+        func.sum(FoodStand.rating_sum).label('rating_sum'),
+        func.sum(FoodStand.review_count).label('review_count')
+    ).filter(FoodStand.is_active == True)
+    query = FoodStand.filter_bbox(query, south, west, north, east).group_by(cell)
+
+    return [{
+        'cell': row.cell,
+        'count': row.count,
+        'latitude': row.latitude,
+        'longitude': row.longitude,
+        'average_rating': round(row.rating_sum / row.review_count, 1) if row.review_count else 0,
+        'total_reviews': row.review_count or 0
+    } for row in query]
+
+
+def stand_stats():
+    """Totales globales para la portada: puestos, reseñas y calificación promedio"""
+    row = db.session.query(
+        func.count(FoodStand.id),
+        func.sum(FoodStand.review_count),
+        func.avg(case((FoodStand.review_count > 0,
+                       FoodStand.rating_sum * 1.0 / FoodStand.review_count)))
+    ).filter(FoodStand.is_active == True).one()
+
+    return {
+        'total_stands': row[0] or 0,
+        'total_reviews': row[1] or 0,
+        'average_rating': row[2] or 0
+    }
+
+
+def fetch_summaries(query):
+    """Ejecuta una consulta de stand_summary_query() y envuelve las filas"""
+    return [StandSummary(row) for row in query]
+
+
+@contextmanager
+def count_queries():
+    """Cuenta las sentencias SQL ejecutadas dentro del bloque.
+
+    Uso::
+
+        with count_queries() as counter:
+            client.get('/')
+        assert counter.count == 1
+    """
+    counter = _QueryCounter()
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
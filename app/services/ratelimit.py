@@ -0,0 +1,252 @@
+"""
+Límite de peticiones por IP con ventana deslizante, del lado del servidor.
+
+El login tiene dos políticas: 'login' cuenta todos los intentos de una IP y
+nunca se reinicia; 'login_account' cuenta los intentos de una IP contra un
+mismo usuario y se reinicia al acertar la contraseña. Así entrar con una
+cuenta propia no borra los intentos fallidos contra otras.
+
+Se usa el contador de ventana deslizante: por clave se guardan los intentos
+de la ventana fija actual y de la anterior, y la estimación es
+
+    anteriores * (1 - fracción transcurrida de la ventana actual) + actuales
+
+Cada comprobación es O(1) en tiempo y espacio. El chequeo se hace en un
+decorador antes de ejecutar la vista, así el tráfico de fuerza bruta se
+rechaza sin consultar usuarios ni calcular hashes de contraseña.
+
+Almacenes (RATELIMIT_STORAGE):
+- memory:             diccionario en el proceso (un solo worker)
+- sqlite:///<ruta>    archivo SQLite compartido por los workers de un mismo host
+
+Las políticas se configuran como '<intentos>/<segundos>' en
+RATELIMIT_<NOMBRE> (p. ej. RATELIMIT_LOGIN = '5/300').
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from functools import wraps
+
+from flask import current_app, request, render_template
+
+Policy = namedtuple('Policy', 'limit window')
+
+DEFAULT_POLICIES = {
+    'login': '20/300',
+    'login_account': '5/300',
+    'forgot_password': '3/300',
+}
+
+
+def parse_policy(value):
+    """'5/300' -> Policy(limit=5, window=300)"""
+    limit, window = str(value).split('/')
+    return Policy(int(limit), int(window))
+
+
+class MemoryStore:
+    """Contadores en memoria del proceso"""
+
+    # A partir de este tamaño se purgan las claves caducadas
+    PRUNE_THRESHOLD = 10000
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, window_index, expires_at):
+        """Suma un intento en la ventana actual; devuelve (actuales, anteriores).
+
+        expires_at es el instante a partir del cual la clave ya no cuenta.
+        """
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or counter[0] < window_index - 1:
+                counter = [window_index, 0, 0, expires_at]
+            elif counter[0] == window_index - 1:
+                counter = [window_index, 0, counter[1], expires_at]
+            counter[1] += 1
+            counter[3] = expires_at
+            self._counters[key] = counter
+            if len(self._counters) > self.PRUNE_THRESHOLD:
+                self._prune()
+            return counter[1], counter[2]
+
+    def reset(self, key):
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def _prune(self):
+        now = time.time()
+        for key in [k for k, c in self._counters.items() if c[3] < now]:
+            del self._counters[key]
+
+
+class SQLiteStore:
+    """Contadores en un archivo SQLite compartido entre procesos.
+
+    Cada hit lee y escribe su fila dentro de una transacción IMMEDIATE, que
+    toma el bloqueo de escritura de SQLite antes de leer: dos procesos no
+    pueden leer el mismo contador y pisarse al escribirlo. Dentro del proceso
+    un lock serializa además los hits de los hilos. Cada proceso abre su
+    propia conexión (nunca se hereda una abierta antes de un fork). Cada
+    PURGE_EVERY hits se borran las claves caducadas.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection_pid = None
+        self._connection_handle = None
+        self._hits = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+        try:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                ' key TEXT PRIMARY KEY, window INTEGER NOT NULL,'
+                ' current INTEGER NOT NULL, previous INTEGER NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+        finally:
+            connection.close()
+
+    def _connection(self):
+        """Conexión del proceso actual; se llama con self._lock tomado"""
+        if self._connection_pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection_handle = connection
+            self._connection_pid = os.getpid()
+        return self._connection_handle
+
+    def hit(self, key, window_index, expires_at):
+        with self._lock:
+            connection = self._connection()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = connection.execute(
+                    'SELECT window, current, previous FROM rate_limits WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None or row[0] < window_index - 1:
+                    current, previous = 1, 0
+                elif row[0] == window_index - 1:
+                    current, previous = 1, row[1]
+                else:
+                    current, previous = row[1] + 1, row[2]
+                connection.execute(
+                    'INSERT OR REPLACE INTO rate_limits (key, window, current, previous, expires_at)'
+                    ' VALUES (?, ?, ?, ?, ?)',
+                    (key, window_index, current, previous, expires_at)
+                )
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+            self._hits += 1
+            if self._hits % self.PURGE_EVERY == 0:
+                connection.execute('DELETE FROM rate_limits WHERE expires_at < ?', (time.time(),))
+            return current, previous
+
+    def reset(self, key):
+        with self._lock:
+            self._connection().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+
+def create_store(url, instance_path):
+    if url == 'memory':
+        return MemoryStore()
+    if url.startswith('sqlite:///'):
+        path = url[len('sqlite:///'):]
+        if not os.path.isabs(path):
+            path = os.path.join(instance_path, path)
+        return SQLiteStore(path)
+    raise RuntimeError(f'Almacén de rate limiting desconocido: {url}')
+
+
+class RateLimiter:
+    """Aplica políticas de ventana deslizante sobre un almacén"""
+
+    def __init__(self, store, policies, clock=time.time):
+        self.store = store
+        self.policies = policies
+        self.clock = clock
+
+    def hit(self, policy_name, identity):
+        """Registra un intento; devuelve (permitido, segundos para reintentar)"""
+        policy = self.policies[policy_name]
+        now = self.clock()
+        window_index = int(now // policy.window)
+        elapsed = (now % policy.window) / policy.window
+
+        # Tras dos ventanas sin intentos la clave ya no influye en la estimación
+        expires_at = (window_index + 2) * policy.window
+        current, previous = self.store.hit(f'{policy_name}:{identity}', window_index, expires_at)
+        estimate = previous * (1 - elapsed) + current
+        if estimate <= policy.limit:
+            return True, 0
+        return False, math.ceil(policy.window * (1 - elapsed))
+
+    def reset(self, policy_name, identity):
+        self.store.reset(f'{policy_name}:{identity}')
+
+
+def get_limiter(app=None):
+    """RateLimiter configurado para la app (uno por proceso y app)"""
+    app = app or current_app._get_current_object()
+    limiter = app.extensions.get('rate_limiter')
+    if limiter is None:
+        policies = {
+            name: parse_policy(app.config.get(f'RATELIMIT_{name.upper()}', default))
+            for name, default in DEFAULT_POLICIES.items()
+        }
+        store = create_store(app.config.get('RATELIMIT_STORAGE', 'memory'), app.instance_path)
+        limiter = app.extensions['rate_limiter'] = RateLimiter(store, policies)
+    return limiter
+
+
+def client_ip():
+    """IP del cliente según el socket o ProxyFix (PROXY_FIX_HOPS saltos de confianza).
+
+    No se lee X-Forwarded-For directamente: el cliente puede escribir lo que
+    quiera en él y así evadir los límites.
+    """
+    return request.remote_addr or 'unknown'
+
+
+def too_many_requests(template, message, retry_after):
+    """Respuesta 429 con el formulario, el aviso y Retry-After.
+
+    El aviso va en el contexto de la plantilla y no con flash(): así un 429
+    no modifica la sesión ni reenvía su cookie.
+    """
+    response = current_app.make_response(
+        (render_template(template, rate_limit_message=message), 429)
+    )
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limited(policy_name, template, message, methods=('POST',)):
+    """Rechaza la petición con 429 antes de la vista si la IP excede la política"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method in methods:
+                allowed, retry_after = get_limiter().hit(policy_name, client_ip())
+                if not allowed:
+                    return too_many_requests(template, message, retry_after)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,115 @@
+"""
+Enrutamiento de lecturas a réplicas.
+
+Las vistas marcadas con @read_only leen de una réplica (REPLICA_DATABASE_URLS,
+separadas por comas; se elige una por petición). Todo lo demás va al primario:
+
+- las escrituras (flush) y cualquier lectura posterior en la misma petición;
+- las vistas sin @read_only;
+- las peticiones de un usuario que escribió hace menos de
+  REPLICA_STICKY_SECONDS, para que vea sus propios cambios aunque la réplica
+  vaya atrasada (la marca viaja en la sesión firmada).
+
+Sin réplicas configuradas todo va al primario. Para probar en local con dos
+archivos SQLite: REPLICA_DATABASE_URLS=sqlite:///replica.db y
+`flask replicas sync` copia el primario a la réplica.
+"""
+
+import os
+import random
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+STICKY_KEY = '_db_primary_until'
+
+
+class RoutingSession(Session):
+    """Sesión que envía las lecturas de vistas @read_only a una réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            replica = replica_for_request()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _resolve_url(url, instance_path):
+    # Igual que Flask-SQLAlchemy: las rutas SQLite relativas van en instance/
+    url = make_url(url)
+    if url.drivername.startswith('sqlite') and url.database and url.database != ':memory:':
+        if not os.path.isabs(url.database):
+            url = url.set(database=os.path.join(instance_path, url.database))
+    return url
+
+
+def init_app(app):
+    """Crea los engines de las réplicas configuradas"""
+    try:
+        from app.services import engine as engine_profiles
+    except ImportError:
+        from services import engine as engine_profiles
+
+    urls = [url.strip() for url in app.config.get('REPLICA_DATABASE_URLS', '').split(',') if url.strip()]
+    engines = []
+    for url in urls:
+        engine = create_engine(_resolve_url(url, app.instance_path),
+                               **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        engine_profiles.apply_profile(engine, app.config)
+        engines.append(engine)
+    app.extensions['read_replicas'] = engines
+    return engines
+
+
+def replica_for_request():
+    """Engine de réplica para la lectura actual, o None si debe ir al primario"""
+    if not has_request_context() or not g.get('_db_read_only') or g.get('_db_wrote'):
+        return None
+    engines = current_app.extensions.get('read_replicas')
+    if not engines:
+        return None
+    if session.get(STICKY_KEY, 0) > time.time():
+        return None
+    if '_db_replica' not in g:
+        g._db_replica = random.choice(engines)
+    return g._db_replica
+
+
+def read_only(view):
+    """Marca una vista como de solo lectura (puede leer de una réplica)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g._db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_write(db_session, flush_context):
+    if not has_request_context():
+        return
+    # El resto de la petición lee del primario (read-after-write)
+    g._db_wrote = True
+    sticky = current_app.config.get('REPLICA_STICKY_SECONDS', 0)
+    if sticky and current_app.extensions.get('read_replicas'):
+        session[STICKY_KEY] = time.time() + sticky
+
+
+def sync_sqlite_replicas(primary_engine, replica_engines):
+    """Copia la base SQLite primaria a cada réplica SQLite (pruebas locales)"""
+    synced = []
+    with primary_engine.connect() as primary:
+        source = primary.connection.dbapi_connection
+        for engine in replica_engines:
+            if engine.dialect.name != 'sqlite':
+                continue
+            engine.dispose()
+            with engine.connect() as replica:
+                source.backup(replica.connection.dbapi_connection)
+            synced.append(engine.url.database)
+    return synced
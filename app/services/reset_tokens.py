@@ -0,0 +1,70 @@
+"""
+Limpieza periódica de tokens de recuperación de contraseña vencidos.
+
+Se borra por lotes (RESET_TOKEN_SWEEP_BATCH filas por transacción) usando el
+índice de expires_at, para no bloquear la tabla con un DELETE grande. Cada
+proceso servidor (cada worker de app/serve.py al arrancar y el servidor de
+desarrollo de app/run.py) inicia un hilo daemon que barre cada
+RESET_TOKEN_SWEEP_INTERVAL segundos (0 lo desactiva); varios procesos
+barriendo a la vez no se estorban porque el DELETE es idempotente. Con otro
+servidor WSGI, programar `flask tokens sweep`.
+"""
+
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import delete, select
+
+from app import db
+from app.models.password_reset_token import PasswordResetToken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH = 500
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def sweep_expired(batch_size=DEFAULT_BATCH, now=None):
+    """Borra los tokens vencidos en lotes; devuelve cuántos se borraron"""
+    tokens = PasswordResetToken.__table__
+    now = now or datetime.utcnow()
+    total = 0
+    while True:
+        expired_ids = select(tokens.c.id).where(tokens.c.expires_at < now).limit(batch_size)
+        with db.engine.begin() as connection:
+            ids = connection.execute(expired_ids).scalars().all()
+            if ids:
+                connection.execute(delete(tokens).where(tokens.c.id.in_(ids)))
+        total += len(ids)
+        if len(ids) < batch_size:
+            return total
+
+
+def _run(app, interval, stop):
+    while not stop.wait(interval):
+        with app.app_context():
+            try:
+                deleted = sweep_expired(app.config.get('RESET_TOKEN_SWEEP_BATCH', DEFAULT_BATCH))
+                if deleted:
+                    logger.info('Tokens de recuperación vencidos eliminados: %s', deleted)
+            except Exception:
+                logger.exception('Error al limpiar tokens de recuperación')
+
+
+def start_sweeper(app):
+    """Arranca (una vez por proceso) el hilo que limpia tokens vencidos"""
+    global _sweeper
+    interval = app.config.get('RESET_TOKEN_SWEEP_INTERVAL', 0)
+    if not interval:
+        return None
+    with _sweeper_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            stop = threading.Event()
+            _sweeper = threading.Thread(target=_run, args=(app, interval, stop),
+                                        name='quadra-reset-token-sweeper', daemon=True)
+            _sweeper.stop = stop
+            _sweeper.start()
+        return _sweeper
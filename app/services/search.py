@@ -0,0 +1,222 @@
+"""
+Búsqueda de texto completo de puestos por nombre, descripción y ubicación.
+
+- SQLite (desarrollo): tabla virtual FTS5 food_stands_fts con el tokenizador
+  unicode61 sin diacríticos, sincronizada con triggers.
+- PostgreSQL (producción): columna search_vector (tsvector ponderado, sin
+  acentos) mantenida por un trigger, con índice GIN, más un índice de trigramas
+  sobre el nombre para tolerar errores de escritura.
+
+Los triggers mantienen el índice al crear o editar puestos por cualquier vía
+(formulario, importación masiva o SQL directo). install() es idempotente y se
+usa desde la migración y al crear las tablas en desarrollo.
+"""
+
+import re
+
+from sqlalchemy import Float, Integer, column, false, select, text
+
+from app.models.food_stand import FoodStand
+
+# Resultados por búsqueda (después de aplicar los demás filtros)
+DEFAULT_LIMIT = 200
+
+# Peso relativo de cada columna en el ranking de FTS5 (nombre > descripción > ubicación)
+_FTS_WEIGHTS = (10.0, 2.0, 1.0, 1.0, 1.0)
+
+_SQLITE_INSTALL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS food_stands_fts USING fts5(
+        name, description, neighborhood, municipality, state,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS food_stands_fts_insert AFTER INSERT ON food_stands BEGIN
+        INSERT INTO food_stands_fts (rowid, name, description, neighborhood, municipality, state)
+        VALUES (new.id, new.name, new.description, new.neighborhood, new.municipality, new.state);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS food_stands_fts_update
+    AFTER UPDATE OF name, description, neighborhood, municipality, state ON food_stands BEGIN
+        DELETE FROM food_stands_fts WHERE rowid = old.id;
+        INSERT INTO food_stands_fts (rowid, name, description, neighborhood, municipality, state)
+        VALUES (new.id, new.name, new.description, new.neighborhood, new.municipality, new.state);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS food_stands_fts_delete AFTER DELETE ON food_stands BEGIN
+        DELETE FROM food_stands_fts WHERE rowid = old.id;
+    END""",
+]
+
+_SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS food_stands_fts_delete',
+    'DROP TRIGGER IF EXISTS food_stands_fts_update',
+    'DROP TRIGGER IF EXISTS food_stands_fts_insert',
+    'DROP TABLE IF EXISTS food_stands_fts',
+]
+
+_POSTGRES_INSTALL = [
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    # unaccent() no es IMMUTABLE; este envoltorio permite usarlo en índices
+    """CREATE OR REPLACE FUNCTION quadra_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+    $$ SELECT public.unaccent('public.unaccent', $1) $$""",
+    'ALTER TABLE food_stands ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    """CREATE OR REPLACE FUNCTION food_stands_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('spanish', quadra_unaccent(coalesce(NEW.name, ''))), 'A') ||
+            setweight(to_tsvector('spanish', quadra_unaccent(coalesce(NEW.description, ''))), 'B') ||
+            setweight(to_tsvector('spanish', quadra_unaccent(
+                concat_ws(' ', NEW.neighborhood, NEW.municipality, NEW.state))), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    'DROP TRIGGER IF EXISTS food_stands_search_vector_trigger ON food_stands',
+    """CREATE TRIGGER food_stands_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, neighborhood, municipality, state ON food_stands
+    FOR EACH ROW EXECUTE FUNCTION food_stands_search_vector_update()""",
+    'CREATE INDEX IF NOT EXISTS ix_food_stands_search_vector ON food_stands USING gin (search_vector)',
+    """CREATE INDEX IF NOT EXISTS ix_food_stands_name_trgm ON food_stands
+    USING gin (quadra_unaccent(lower(name)) gin_trgm_ops)""",
+]
+
+_POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS ix_food_stands_name_trgm',
+    'DROP INDEX IF EXISTS ix_food_stands_search_vector',
+    'DROP TRIGGER IF EXISTS food_stands_search_vector_trigger ON food_stands',
+    'DROP FUNCTION IF EXISTS food_stands_search_vector_update()',
+    'ALTER TABLE food_stands DROP COLUMN IF EXISTS search_vector',
+    'DROP FUNCTION IF EXISTS quadra_unaccent(text)',
+]
+
+
+# Objetos que crea install() fuera de los modelos: autogenerate no debe borrarlos
+_SEARCH_TABLE_PREFIX = 'food_stands_fts'
+_SEARCH_COLUMNS = {'search_vector'}
+_SEARCH_INDEXES = {'ix_food_stands_search_vector', 'ix_food_stands_name_trgm'}
+_SQLITE_OBJECTS = {
+    'food_stands_fts', 'food_stands_fts_insert', 'food_stands_fts_update', 'food_stands_fts_delete',
+}
+
+
+def is_search_object(name, type_):
+    """True para las tablas, columnas e índices del índice de búsqueda (include_object de Alembic)"""
+    if type_ == 'table':
+        return bool(name) and name.startswith(_SEARCH_TABLE_PREFIX)
+    if type_ == 'column':
+        return name in _SEARCH_COLUMNS
+    if type_ == 'index':
+        return name in _SEARCH_INDEXES
+    return False
+
+
+def _run(connection, statements):
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def install(connection):
+    """Crea el índice de búsqueda y sus triggers para el motor en uso"""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        _run(connection, _SQLITE_INSTALL)
+    elif dialect == 'postgresql':
+        _run(connection, _POSTGRES_INSTALL)
+
+
+def is_installed(connection):
+    """True si existen el índice y todos sus triggers (un batch_alter_table de
+    SQLite sobre food_stands los borra sin aviso)"""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        names = set(connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE name LIKE 'food_stands_fts%'"
+        )).scalars())
+        return _SQLITE_OBJECTS <= names
+    if dialect == 'postgresql':
+        return connection.execute(text(
+            "SELECT 1 FROM pg_trigger WHERE tgname = 'food_stands_search_vector_trigger'"
+        )).first() is not None
+    return True
+
+
+def uninstall(connection):
+    """Elimina el índice de búsqueda y sus triggers"""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        _run(connection, _SQLITE_UNINSTALL)
+    elif dialect == 'postgresql':
+        _run(connection, _POSTGRES_UNINSTALL)
+
+
+def rebuild(connection):
+    """Vuelve a indexar todos los puestos"""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        connection.execute(text('DELETE FROM food_stands_fts'))
+        connection.execute(text(
+            'INSERT INTO food_stands_fts (rowid, name, description, neighborhood, municipality, state) '
+            'SELECT id, name, description, neighborhood, municipality, state FROM food_stands'
+        ))
+    elif dialect == 'postgresql':
+        # El trigger recalcula search_vector al "tocar" el nombre
+        connection.execute(text('UPDATE food_stands SET name = name'))
+
+
+def _terms(query):
+    """Palabras de la búsqueda (solo caracteres de palabra, sin operadores)"""
+    return re.findall(r'\w+', query.lower())
+
+
+def match_subquery(dialect, query):
+    """Subconsulta (id, rank) de los puestos que coinciden con la búsqueda.
+
+    rank menor es más relevante. No lleva LIMIT: quien la usa aplica sus
+    filtros y después acota. Devuelve None si la búsqueda no tiene palabras.
+    Cada palabra se busca como prefijo y todas deben aparecer en alguna de las
+    columnas indexadas; los acentos se ignoran ("guero" encuentra "Güero").
+    """
+    terms = _terms(query)
+    if not terms:
+        return None
+
+    if dialect == 'sqlite':
+        weights = ', '.join(str(weight) for weight in _FTS_WEIGHTS)
+        statement = text(
+            f'SELECT rowid AS id, bm25(food_stands_fts, {weights}) AS rank '
+            f'FROM food_stands_fts WHERE food_stands_fts MATCH :match'
+        ).bindparams(match=' '.join(f'"{term}"*' for term in terms))
+    elif dialect == 'postgresql':
+        statement = text(
+            """SELECT id, -(ts_rank(search_vector, q)
+                            + similarity(quadra_unaccent(lower(name)), quadra_unaccent(lower(:query)))) AS rank
+               FROM food_stands, to_tsquery('spanish', quadra_unaccent(:tsquery)) AS q
+               WHERE search_vector @@ q
+                  OR quadra_unaccent(lower(name)) % quadra_unaccent(lower(:query))"""
+        ).bindparams(tsquery=' & '.join(f'{term}:*' for term in terms), query=' '.join(terms))
+    else:
+        # Otros motores: coincidencia simple por nombre
+        statement = text(
+            'SELECT id, 0.0 AS rank FROM food_stands WHERE lower(name) LIKE :pattern'
+        ).bindparams(pattern=f"%{' '.join(terms)}%")
+
+    return statement.columns(column('id', Integer), column('rank', Float)).subquery('search_matches')
+
+
+def filter_stands(stands_query, dialect, query):
+    """Restringe una consulta de FoodStand a los que coinciden, del más al menos relevante.
+
+    Los filtros de la consulta se combinan con la coincidencia en la misma
+    sentencia, así que un LIMIT posterior cuenta solo puestos que los cumplen.
+    """
+    matches = match_subquery(dialect, query)
+    if matches is None:
+        return stands_query.filter(false())
+    return stands_query.join(matches, FoodStand.id == matches.c.id).order_by(matches.c.rank, FoodStand.id)
+
+
+def search_stand_ids(connection, query, limit=DEFAULT_LIMIT):
+    """Ids de puestos que coinciden con la búsqueda, del más al menos relevante"""
+    matches = match_subquery(connection.dialect.name, query)
+    if matches is None:
+        return []
+    rows = connection.execute(select(matches.c.id).order_by(matches.c.rank, matches.c.id).limit(limit))
+    return [row[0] for row in rows]
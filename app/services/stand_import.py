@@ -0,0 +1,439 @@
+"""
+Importación masiva de puestos desde CSV o GeoJSON (`flask stands import`).
+
+El archivo se lee en streaming, cada fila se valida igual que en
+create_stand y las válidas se insertan por lotes: COPY en PostgreSQL y
+executemany en SQLite. Como se inserta con Core (sin eventos del ORM), aquí
+se calculan geohash y puntaje bayesiano; al final se refrescan las tablas de
+clasificación de las ubicaciones tocadas y la versión de datos. El índice de
+búsqueda lo mantienen los triggers de la base.
+
+Cada lote se confirma junto con un checkpoint (fila de stand_imports) con la
+última fila procesada; si la importación se interrumpe, al repetir el comando
+se continúa desde ahí.
+"""
+
+import csv
+import io
+import itertools
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+
+from app import db
+from app.models.food_stand import FoodStand
+from app.models.stand_import import StandImport
+from app.services import leaderboard, versioning
+from app.services.geo import encode_geohash
+
+# Columnas de texto opcionales y su longitud máxima (como en el modelo)
+OPTIONAL_FIELDS = {
+    'address': 200,
+    'municipality': 100,
+    'state': 100,
+    'neighborhood': 100,
+    'postal_code': 10,
+}
+
+LATITUDE_KEYS = ('latitude', 'lat')
+LONGITUDE_KEYS = ('longitude', 'lng', 'lon')
+
+# Tamaño máximo de un Feature de una FeatureCollection antes de darlo por mal formado
+MAX_FEATURE_CHARS = 1024 * 1024
+# Límite entre dos features del arreglo: "}" , "{"
+FEATURE_BOUNDARY = re.compile(r'\}\s*,\s*(?=\{)')
+# Inicio habitual de un Feature (distingue uno nuevo de un fragmento del anterior)
+FEATURE_START = re.compile(r'\{\s*"type"\s*:\s*"Feature"')
+
+# Extensiones de GeoJSONSeq / NDJSON (un Feature por línea)
+SEQUENCE_EXTENSIONS = ('.geojsonl', '.geojsons', '.ndjson')
+
+COPY_COLUMNS = ('name', 'description', 'latitude', 'longitude', 'address', 'municipality',
+                'state', 'neighborhood', 'postal_code', 'geohash', 'rating_sum', 'review_count',
+                'bayesian_score', 'created_at', 'updated_at', 'is_active', 'user_id')
+
+
+class RowError(ValueError):
+    """Fila inválida; el mensaje va al reporte de errores (data: registro original si no es la fila)"""
+
+    def __init__(self, message, data=None):
+        super().__init__(message)
+        self.data = data
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.geojson', '.json', '.geojsonl', '.geojsons', '.ndjson'):
+        return 'geojson'
+    raise ValueError(f'No se reconoce el formato de {path}; usa --format')
+
+
+def read_csv(path):
+    """(número de fila, dict) por cada registro del CSV"""
+    with open(path, newline='', encoding='utf-8-sig') as source:
+        for number, row in enumerate(csv.DictReader(source), start=1):
+            yield number, row
+
+
+def _geojson_objects(source, sequence=False, chunk_size=64 * 1024):
+    """Objetos JSON del arreglo "features" (o uno por línea en GeoJSONSeq), sin cargar el archivo.
+
+    Una línea de GeoJSONSeq o un Feature de una colección que no es JSON
+    válido se entrega como RowError para que cuente como error de esa fila y
+    no detenga la importación.
+    sequence indica que el archivo es GeoJSONSeq por su extensión; si no, se
+    detecta porque la primera línea es un objeto completo.
+    """
+    decoder = json.JSONDecoder()
+    first_line = source.readline()
+    try:
+        first = json.loads(first_line.strip().lstrip('\x1e'))
+    except json.JSONDecodeError:
+        first = None
+    if isinstance(first, dict) and first.get('type') == 'FeatureCollection':
+        # Colección completa en una sola línea: ya está en memoria
+        yield from first.get('features') or []
+        return
+    if sequence or isinstance(first, dict):
+        # GeoJSONSeq / NDJSON: un Feature por línea
+        for line in itertools.chain([first_line], source):
+            line = line.strip().lstrip('\x1e')
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield RowError(f'JSON inválido: {e.msg} (columna {e.colno})', data=line)
+        return
+
+    # Avanzar hasta el inicio del arreglo "features"
+    buffer = first_line
+    while True:
+        position = buffer.find('"features"')
+        start = buffer.find('[', position) if position != -1 else -1
+        if start != -1:
+            break
+        chunk = source.read(chunk_size)
+        if not chunk:
+            raise ValueError('El GeoJSON no tiene un arreglo "features"')
+        buffer += chunk
+
+    position = start + 1
+    # Tras un Feature mal formado se descartan los fragmentos (objetos anidados
+    # del Feature roto) hasta volver a encontrar un Feature
+    resyncing = False
+    while True:
+        # Saltar espacios y comas entre features
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer):
+                break
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            buffer, position = buffer[position:] + chunk, 0
+
+        if buffer[position] == ']':
+            return
+        try:
+            feature, end = decoder.raw_decode(buffer, position)
+            error = None
+        except json.JSONDecodeError as e:
+            # Un Feature cortado por el fin del bloque falla cerca del final del
+            # búfer (o en una cadena sin cerrar): se lee otro bloque, hasta
+            # MAX_FEATURE_CHARS. Cualquier otro error es un Feature mal formado.
+            truncated = e.pos >= len(buffer) - 32 or e.msg.startswith('Unterminated string')
+            if truncated and len(buffer) - position < MAX_FEATURE_CHARS:
+                chunk = source.read(chunk_size)
+                if chunk:
+                    buffer, position = buffer[position:] + chunk, 0
+                    continue
+            error = e
+
+        if error is None and not (resyncing and not _looks_like_feature(feature)):
+            resyncing = False
+            yield feature
+            buffer, position = buffer[end:], 0
+            continue
+
+        if error is not None and (not resyncing or FEATURE_START.match(buffer, position)):
+            yield RowError(f'Feature mal formado: {error.msg} '
+                           f'(o mayor que {MAX_FEATURE_CHARS // 1024} KiB)',
+                           data=buffer[position:position + 200])
+        resyncing = True
+        # Continuar en el siguiente límite "},{" entre objetos
+        search_from = end if error is None else max(error.pos, position + 1)
+        while True:
+            boundary = FEATURE_BOUNDARY.search(buffer, search_from)
+            if boundary:
+                buffer, position = buffer[boundary.end():], 0
+                break
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            # Conservar el final por si el límite quedó partido entre bloques
+            keep = min(len(buffer), 64)
+            buffer, search_from = buffer[-keep:] + chunk, 0
+
+
+def _looks_like_feature(value):
+    return isinstance(value, dict) and value.get('type') == 'Feature'
+
+
+def read_geojson(path):
+    """(número de feature, dict de propiedades con latitude/longitude) por cada Feature.
+
+    Los registros ilegibles se entregan como (número, RowError).
+    """
+    sequence = os.path.splitext(path)[1].lower() in SEQUENCE_EXTENSIONS
+    with open(path, encoding='utf-8-sig') as source:
+        for number, feature in enumerate(_geojson_objects(source, sequence), start=1):
+            if isinstance(feature, RowError):
+                yield number, feature
+                continue
+            if not isinstance(feature, dict):
+                yield number, RowError('El Feature no es un objeto JSON', data=feature)
+                continue
+            if not isinstance(feature.get('properties') or {}, dict) or \
+                    not isinstance(feature.get('geometry') or {}, dict):
+                yield number, RowError('properties y geometry deben ser objetos JSON', data=feature)
+                continue
+            properties = dict(feature.get('properties') or {})
+            geometry = feature.get('geometry') or {}
+            if geometry.get('type') == 'Point' and len(geometry.get('coordinates') or ()) >= 2:
+                properties['longitude'], properties['latitude'] = geometry['coordinates'][:2]
+            yield number, properties
+
+
+def _first(row, keys):
+    for key in keys:
+        value = row.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def validate_row(row, owner_id, prior_score, now):
+    """Valores de columna para una fila, o RowError con el motivo"""
+    name = str(row.get('name') or '').strip()
+    description = str(row.get('description') or '').strip()
+    latitude = _first(row, LATITUDE_KEYS)
+    longitude = _first(row, LONGITUDE_KEYS)
+
+    if not all([name, description, latitude is not None, longitude is not None]):
+        raise RowError('Faltan campos requeridos (name, description, latitude, longitude)')
+    try:
+        latitude = float(latitude)
+        longitude = float(longitude)
+    except (TypeError, ValueError):
+        raise RowError('Coordenadas no numéricas')
+    if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
+        raise RowError('Coordenadas geográficas inválidas')
+    if len(name) > 100:
+        raise RowError('name excede 100 caracteres')
+
+    values = {
+        'name': name,
+        'description': description,
+        'latitude': latitude,
+        'longitude': longitude,
+    }
+    for field, max_length in OPTIONAL_FIELDS.items():
+        value = str(row.get(field) or '').strip()
+        if len(value) > max_length:
+            raise RowError(f'{field} excede {max_length} caracteres')
+        values[field] = value or None
+
+    values.update(
+        geohash=encode_geohash(latitude, longitude),
+        rating_sum=0,
+        review_count=0,
+        bayesian_score=prior_score,
+        created_at=now,
+        updated_at=now,
+        is_active=True,
+        user_id=owner_id,
+    )
+    return values
+
+
+def _copy_rows(connection, rows):
+    """COPY FROM STDIN en PostgreSQL (None -> NULL)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            '' if row[column] is None else
+            ('t' if row[column] is True else 'f' if row[column] is False else row[column])
+            for column in COPY_COLUMNS
+        ])
+    buffer.seek(0)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY food_stands ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def insert_batch(connection, rows):
+    if connection.dialect.name == 'postgresql':
+        _copy_rows(connection, rows)
+    else:
+        # Una sola sentencia con executemany
+        connection.execute(insert(FoodStand.__table__), rows)
+
+
+def trim_error_report(path, last_row):
+    """Deja en el reporte de errores solo las filas hasta last_row.
+
+    Al reanudar se vuelven a procesar las filas posteriores al último
+    checkpoint; sus errores ya escritos se quitan para no duplicarlos.
+    Devuelve False si el reporte no existe o está vacío.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    temp_path = f'{path}.tmp'
+    with open(path, newline='', encoding='utf-8') as source, \
+            open(temp_path, 'w', newline='', encoding='utf-8') as target:
+        reader, writer = csv.reader(source), csv.writer(target)
+        for index, record in enumerate(reader):
+            # La primera fila es el encabezado
+            if index == 0 or (record and record[0].isdigit() and int(record[0]) <= last_row):
+                writer.writerow(record)
+    os.replace(temp_path, path)
+    return True
+
+
+class Checkpoint:
+    """Progreso persistido de una importación (fila de stand_imports).
+
+    save() recibe la conexión del lote: el lote y su checkpoint se confirman
+    en la misma transacción, así que al reanudar nunca se repite un lote ya
+    insertado (los puestos no tienen una clave natural para deduplicar).
+    """
+
+    def __init__(self, key, source):
+        self.source = os.path.abspath(source)
+        # Por omisión, una importación por archivo
+        self.key = key or self.source
+        self.last_row = 0
+        self.inserted = 0
+        self.errors = 0
+        self.locations = set()
+        self.completed = False
+
+    def load(self):
+        imports = StandImport.__table__
+        with db.engine.connect() as connection:
+            row = connection.execute(select(imports).where(imports.c.key == self.key)).first()
+        if row is None:
+            return False
+        if row.source != self.source:
+            raise ValueError(f'El checkpoint {self.key} es de otro archivo: {row.source}')
+        self.last_row = row.last_row
+        self.inserted = row.inserted
+        self.errors = row.errors
+        self.locations = {tuple(location) for location in json.loads(row.locations or '[]')}
+        self.completed = row.completed
+        return True
+
+    def save(self, connection):
+        imports = StandImport.__table__
+        values = {
+            'source': self.source,
+            'last_row': self.last_row,
+            'inserted': self.inserted,
+            'errors': self.errors,
+            'locations': json.dumps(sorted(self.locations, key=lambda l: (l[0] or '', l[1] or ''))),
+            'completed': self.completed,
+            'updated_at': datetime.utcnow(),
+        }
+        updated = connection.execute(update(imports).where(imports.c.key == self.key).values(**values))
+        if not updated.rowcount:
+            connection.execute(insert(imports).values(key=self.key, **values))
+
+
+def import_stands(path, owner_id, fmt=None, batch_size=1000, checkpoint=None,
+                  error_writer=None, progress=None):
+    """Importa los puestos de path; devuelve un dict con el resumen.
+
+    error_writer recibe (fila, motivo, datos) por cada fila inválida y
+    progress(resumen) se llama después de cada lote confirmado.
+    """
+    fmt = fmt or detect_format(path)
+    rows = read_csv(path) if fmt == 'csv' else read_geojson(path)
+    prior_score = leaderboard.bayesian_score(0, 0)
+    skip_until = checkpoint.last_row if checkpoint else 0
+
+    summary = {
+        'inserted': checkpoint.inserted if checkpoint else 0,
+        'errors': checkpoint.errors if checkpoint else 0,
+        'rows': skip_until,
+        'resumed_from': skip_until,
+        'batches': 0,
+        'elapsed': 0.0,
+    }
+    # Ubicaciones tocadas, incluidas las de lotes anteriores a la reanudación
+    locations = set(checkpoint.locations) if checkpoint else set()
+    batch = []
+    last_row = skip_until
+    started = time.perf_counter()
+
+    def flush():
+        if not batch and last_row == summary['rows']:
+            return
+        with db.engine.begin() as connection:
+            if batch:
+                insert_batch(connection, batch)
+            if checkpoint:
+                checkpoint.last_row = last_row
+                checkpoint.inserted = summary['inserted'] + len(batch)
+                checkpoint.errors = summary['errors']
+                checkpoint.locations = set(locations)
+                checkpoint.save(connection)
+        summary['inserted'] += len(batch)
+        summary['rows'] = last_row
+        summary['batches'] += 1
+        summary['elapsed'] = time.perf_counter() - started
+        batch.clear()
+        if progress:
+            progress(summary)
+
+    for number, row in rows:
+        if number <= skip_until:
+            continue
+        last_row = number
+        try:
+            if isinstance(row, RowError):
+                raise row
+            values = validate_row(row, owner_id, prior_score, datetime.utcnow())
+        except RowError as e:
+            summary['errors'] += 1
+            if error_writer:
+                error_writer(number, str(e), row if e.data is None else e.data)
+            continue
+        batch.append(values)
+        locations.add((values['state'], values['municipality']))
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+
+    # Tablas de clasificación (cada ámbito tocado una sola vez) y versión de datos, al final
+    with db.engine.begin() as connection:
+        if locations:
+            leaderboard.refresh_locations(connection, locations)
+        versioning.bump(connection)
+        if checkpoint:
+            checkpoint.completed = True
+            checkpoint.save(connection)
+    summary['elapsed'] = time.perf_counter() - started
+    return summary
@@ -0,0 +1,80 @@
+"""
+Arranque rápido de QUADRA.
+
+- StartupProfile mide el tiempo de cada fase del arranque (importaciones,
+  configuración, base de datos, blueprints, esquema...). `--profile-startup`
+  en run.py/start.py imprime el reporte.
+- schema_revisions() compara la revisión head de Alembic con la fila de
+  alembic_version en una sola consulta; si coinciden no hace falta
+  db.create_all() (que revisa tabla por tabla).
+
+Este módulo no importa la app al cargarse porque app/__init__.py lo usa
+antes de terminar de importarse.
+"""
+
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+
+class StartupProfile:
+    """Cronómetro por vueltas: mark(nombre) cierra la fase que termina ahí"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._last = self.started_at
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def report(self):
+        total = sum(elapsed for _, elapsed in self.phases) or 1e-9
+        width = max((len(name) for name, _ in self.phases), default=10)
+        lines = ['⏱️  Arranque por fases:']
+        for name, elapsed in self.phases:
+            lines.append(f'   {name:<{width}} {elapsed * 1000:8.1f} ms {elapsed / total:6.1%}')
+        lines.append(f"   {'total':<{width}} {total * 1000:8.1f} ms")
+        return '\n'.join(lines)
+
+
+profile = StartupProfile()
+
+
+# Última revisión que existía antes de que init_db registrara la versión: una
+# base con tablas pero sin alembic_version se creó con ese esquema
+BASELINE_REVISION = 'add_reset_token_fields'
+
+
+def migrations_directory(app):
+    return os.path.join(app.root_path, 'migrations')
+
+
+def alembic_head(app):
+    """Revisión head de los scripts de migración"""
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory(migrations_directory(app)).get_current_head()
+
+
+def schema_revisions(app, connection):
+    """(revisión de la base, revisión head); la de la base es None si no hay alembic_version"""
+    try:
+        current = connection.execute(text('SELECT version_num FROM alembic_version')).scalar()
+    except DBAPIError:
+        connection.rollback()
+        current = None
+    return current, alembic_head(app)
+
+
+def stamp_head(app, connection):
+    """Registra la base como migrada hasta head (tras crearla con create_all)"""
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    context = MigrationContext.configure(connection)
+    context.stamp(ScriptDirectory(migrations_directory(app)), 'head')
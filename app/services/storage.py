@@ -0,0 +1,213 @@
+"""
+Almacenamiento de archivos subidos direccionado por contenido.
+
+Cada archivo se guarda con el SHA-256 de sus bytes como nombre
+(<hash>.<ext>), así dos fotos idénticas ocupan un solo archivo y dos subidas
+con el mismo nombre nunca chocan. La subida se copia en bloques a un archivo
+temporal mientras se calcula el hash y se vigila el tamaño máximo, sin cargarla
+completa en memoria.
+
+El backend es intercambiable (UPLOAD_STORAGE); por defecto se usa el disco
+local en UPLOAD_FOLDER. Un backend nuevo hereda de StorageBackend y se
+registra con register_backend().
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+
+from flask import current_app, abort, send_file
+from werkzeug.exceptions import RequestEntityTooLarge
+
+CHUNK_SIZE = 64 * 1024
+
+# Nombres <sha256>.<ext> y sus versiones <sha256>_<rendition>.<ext>: su contenido nunca cambia
+CONTENT_ADDRESSED_NAME = re.compile(r'^[0-9a-f]{64}(?:_[a-z]+)?\.[a-z0-9]+$')
+# Subida sin procesar: solo es fuente de las versiones (se entrega la versión 'original')
+UNPROCESSED_UPLOAD_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+SERVE_DIRECT = 'direct'
+SERVE_X_ACCEL = 'x-accel'
+SERVE_X_SENDFILE = 'x-sendfile'
+
+
+class StorageBackend(ABC):
+    """Interfaz de un backend de almacenamiento de uploads"""
+
+    @abstractmethod
+    def exists(self, key):
+        """True si hay un archivo guardado bajo key"""
+
+    @abstractmethod
+    def save(self, key, source_path):
+        """Guarda el archivo local source_path bajo key y lo elimina del origen"""
+
+    @abstractmethod
+    def open(self, key):
+        """Abre el archivo guardado para lectura binaria"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Elimina el archivo (sin error si no existe)"""
+
+    def local_path(self, key):
+        """Ruta en disco del archivo, o None si el backend no es local"""
+        return None
+
+    def temp_dir(self):
+        """Directorio para temporales (el mismo sistema de archivos permite renombrar)"""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Archivos en un directorio del disco local"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        # Las claves son nombres planos; nunca rutas
+        if os.path.basename(key) != key or key.startswith('.'):
+            raise ValueError(f'Clave de almacenamiento inválida: {key!r}')
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def save(self, key, source_path):
+        # os.replace es atómico: un lector nunca ve un archivo a medias
+        os.replace(source_path, self._path(key))
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key):
+        return self._path(key)
+
+    def temp_dir(self):
+        return self.root
+
+
+BACKENDS = {
+    'local': lambda app: LocalStorage(app.config['UPLOAD_FOLDER']),
+}
+
+
+def register_backend(name, factory):
+    """Registra un backend; factory recibe la app y devuelve un StorageBackend"""
+    BACKENDS[name] = factory
+
+
+def get_storage(app=None):
+    """Backend de almacenamiento configurado para la app (uno por app)"""
+    app = app or current_app._get_current_object()
+    storage = app.extensions.get('upload_storage')
+    if storage is None:
+        name = app.config.get('UPLOAD_STORAGE', 'local')
+        if name not in BACKENDS:
+            raise RuntimeError(f'Backend de almacenamiento desconocido: {name}')
+        storage = app.extensions['upload_storage'] = BACKENDS[name](app)
+    return storage
+
+
+def store_upload(file, max_size, storage=None):
+    """Guarda un FileStorage subido y devuelve su clave <sha256>.<ext>.
+
+    Lanza RequestEntityTooLarge si el contenido supera max_size bytes. Si ya
+    existe un archivo con el mismo contenido, se reutiliza.
+    """
+    storage = storage or get_storage()
+    ext = os.path.splitext(file.filename or '')[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+
+    handle, temp_path = tempfile.mkstemp(prefix='.upload-', dir=storage.temp_dir())
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise RequestEntityTooLarge()
+                digest.update(chunk)
+                temp_file.write(chunk)
+
+        key = f'{digest.hexdigest()}{ext}'
+        if storage.exists(key):
+            os.remove(temp_path)
+        else:
+            storage.save(key, temp_path)
+        return key
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def store_file(storage, key, source_path):
+    """Guarda un archivo local ya generado (p. ej. una versión de imagen)"""
+    if storage.exists(key):
+        os.remove(source_path)
+    else:
+        storage.save(key, source_path)
+
+
+def serve_upload(filename):
+    """Respuesta para un archivo subido según UPLOAD_SERVE_MODE.
+
+    - direct: Flask envía el archivo (con soporte de Range y 304).
+    - x-accel: nginx entrega el archivo vía X-Accel-Redirect hacia
+      UPLOAD_ACCEL_PREFIX (una location internal).
+    - x-sendfile: Apache/lighttpd lo entregan vía X-Sendfile.
+
+    Los nombres direccionados por contenido se marcan como inmutables con un
+    max-age de un año; el resto usa UPLOAD_CACHE_MAX_AGE. Las subidas sin
+    procesar (<sha256>.<ext>) no se entregan: pueden pesar hasta
+    MAX_CONTENT_LENGTH.
+    """
+    app = current_app
+    storage = get_storage()
+    if UNPROCESSED_UPLOAD_NAME.match(filename):
+        abort(404)
+    try:
+        if not storage.exists(filename):
+            abort(404)
+    except ValueError:
+        abort(404)
+
+    immutable = bool(CONTENT_ADDRESSED_NAME.match(filename))
+    max_age = IMMUTABLE_MAX_AGE if immutable else app.config['UPLOAD_CACHE_MAX_AGE']
+    mode = app.config['UPLOAD_SERVE_MODE']
+    path = storage.local_path(filename)
+
+    if mode == SERVE_X_ACCEL and path:
+        # Python solo valida la petición; nginx lee el archivo y atiende Range
+        response = app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        response.headers['X-Accel-Redirect'] = app.config['UPLOAD_ACCEL_PREFIX'].rstrip('/') + '/' + filename
+    elif path:
+        # Con USE_X_SENDFILE (modo x-sendfile) send_file solo pone la cabecera
+        response = send_file(path, conditional=True, max_age=max_age)
+    else:
+        response = send_file(storage.open(filename), download_name=filename,
+                             conditional=True, max_age=max_age)
+
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    return response
@@ -0,0 +1,95 @@
+"""
+Versionado de datos y GET condicional (ETag / If-None-Match).
+
+Cada escritura de puestos o reseñas incrementa un contador monotónico en
+data_versions (una vez por flush). Las vistas públicas derivan de él un ETag
+fuerte y responden 304 antes de tocar el ORM cuando el cliente ya tiene la
+versión actual.
+"""
+
+import hashlib
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.data_version import DataVersion
+from app.models.food_stand import FoodStand
+from app.models.review import Review
+
+STANDS = 'stands'
+
+# Las páginas HTML incluyen tokens CSRF con vigencia limitada; su ETag cambia
+# cada CSRF_BUCKET_SECONDS para no servir formularios con tokens vencidos.
+CSRF_BUCKET_SECONDS = 1800
+
+
+def bump(connection, name=STANDS):
+    """Incrementa atómicamente la versión de un conjunto de datos"""
+    versions = DataVersion.__table__
+    result = connection.execute(
+        update(versions)
+        .where(versions.c.name == name)
+        .values(version=versions.c.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(versions).values(name=name, version=1, updated_at=datetime.utcnow()))
+
+
+def current(name=STANDS):
+    """Versión actual de un conjunto de datos (0 si nunca se ha escrito)"""
+    versions = DataVersion.__table__
+    return db.session.execute(
+        select(versions.c.version).where(versions.c.name == name)
+    ).scalar() or 0
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_flush(session, flush_context):
+    """Incrementa la versión una sola vez por flush si cambió algún puesto o reseña"""
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, (FoodStand, Review)):
+            bump(session.connection())
+            return
+
+
+def conditional_get(name=STANDS, per_user=False, public=False):
+    """Decorador para vistas GET: ETag fuerte derivado de la versión de datos.
+
+    Con per_user=True el ETag depende también del usuario (páginas HTML
+    personalizadas). public=True permite que cachés compartidas guarden la
+    respuesta (solo para datos públicos). Si hay mensajes flash pendientes la
+    vista se ejecuta siempre, porque la página los mostrará.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            parts = [request.endpoint, str(current(name)), request.query_string.decode()]
+            parts += [f'{key}={value}' for key, value in sorted(kwargs.items())]
+            if per_user:
+                user_id = current_user.get_id() if current_user.is_authenticated else 'anon'
+                parts += [str(user_id), str(int(time.time() // CSRF_BUCKET_SECONDS))]
+            etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'public, no-cache' if public else 'private, no-cache'
+            if per_user:
+                response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,19 @@
+"""
+Herramientas de medición de QUADRA (no se importan desde la aplicación).
+
+- dataset.py: datos sintéticos (usuarios, puestos agrupados alrededor de
+  ciudades mexicanas y reseñas) a cualquier escala.
+- micro.py: micro-benchmarks de los caminos críticos de modelos y geo, con
+  percentiles y líneas base en JSON para detectar regresiones.
+- queries.py: cota de consultas SQL por vista (detecta N+1).
+- seed.py: siembra la base configurada y escribe el manifiesto de la prueba
+  de carga.
+- load.py: generador de carga HTTP multiproceso (login con CSRF, mezcla
+  ponderada, histogramas de latencia por endpoint).
+
+Se ejecutan desde la raíz del proyecto, p. ej.::
+
+    python -m benchmarks.micro --sizes 1000 10000 100000 --save
+    python -m benchmarks.queries
+    python -m benchmarks.seed --stands 20000 && python -m benchmarks.load --spawn
+"""
@@ -0,0 +1,196 @@
+"""
+Datos sintéticos para benchmarks y pruebas de carga.
+
+Genera usuarios, puestos agrupados alrededor de ciudades mexicanas (más
+puestos en las ciudades grandes, dispersión normal alrededor del centro) y
+reseñas de usuarios distintos por puesto. Inserta con Core por lotes, así que
+calcula aquí lo que normalmente hacen los eventos del ORM (geohash y
+agregados de calificación); al final recalcula las tablas de clasificación.
+El índice de búsqueda lo llenan los triggers de la base.
+
+Todos los usuarios comparten una contraseña (se hashea una sola vez) para que
+el generador de carga pueda iniciar sesión con cualquiera.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app import db
+from app.models.food_stand import FoodStand
+from app.models.review import Review
+from app.models.user import User
+from app.services import leaderboard, versioning
+from app.services.geo import encode_geohash
+from app.services.passwords import hash_password
+
+DEFAULT_PASSWORD = 'quadra-bench'
+
+# (ciudad/municipio, estado, latitud, longitud, peso relativo, dispersión en grados)
+CITIES = [
+    ('Cuauhtémoc', 'Ciudad de México', 19.4326, -99.1332, 10, 0.03),
+    ('Coyoacán', 'Ciudad de México', 19.3467, -99.1617, 6, 0.025),
+    ('Iztapalapa', 'Ciudad de México', 19.3574, -99.0671, 6, 0.03),
+    ('Guadalajara', 'Jalisco', 20.6597, -103.3496, 8, 0.04),
+    ('Zapopan', 'Jalisco', 20.7214, -103.3918, 4, 0.04),
+    ('Monterrey', 'Nuevo León', 25.6866, -100.3161, 7, 0.04),
+    ('San Pedro Garza García', 'Nuevo León', 25.6573, -100.4027, 2, 0.02),
+    ('Puebla', 'Puebla', 19.0414, -98.2063, 5, 0.035),
+    ('Tijuana', 'Baja California', 32.5149, -117.0382, 4, 0.05),
+    ('León', 'Guanajuato', 21.1250, -101.6860, 4, 0.04),
+    ('Mérida', 'Yucatán', 20.9674, -89.5926, 3, 0.04),
+    ('Querétaro', 'Querétaro', 20.5888, -100.3899, 3, 0.03),
+    ('Oaxaca de Juárez', 'Oaxaca', 17.0732, -96.7266, 2, 0.02),
+    ('Veracruz', 'Veracruz', 19.1738, -96.1342, 2, 0.03),
+    ('Toluca', 'Estado de México', 19.2826, -99.6557, 2, 0.03),
+]
+
+NEIGHBORHOODS = ['Centro', 'Roma', 'Del Valle', 'Americana', 'Obrera', 'Jardines', 'Las Flores',
+                 'San Miguel', 'La Joya', 'Santa Fe', 'Del Carmen', 'Industrial', 'Lomas']
+
+FOODS = ['Tacos al pastor', 'Tacos de canasta', 'Tamales', 'Elotes', 'Esquites', 'Quesadillas',
+         'Gorditas', 'Tortas', 'Birria', 'Pozole', 'Churros', 'Tlayudas', 'Cochinita pibil',
+         'Hot dogs', 'Aguas frescas', 'Sopes', 'Huaraches', 'Barbacoa', 'Mariscos', 'Marquesitas']
+
+NAMES = ['Don Pepe', 'La Güera', 'El Güero', 'Doña Mary', 'El Compa', 'La Esquina', 'Los Primos',
+         'El Chino', 'Tía Lupe', 'El Paisa', 'La Flaca', 'Don Chuy', 'El Gordo', 'La Abuela']
+
+ADJECTIVES = ['recién hechos', 'con salsa de la casa', 'al carbón', 'caseros', 'de receta familiar',
+              'con tortillas a mano', 'bien servidos', 'estilo norteño', 'con mucho sabor']
+
+COMMENTS = ['Muy rico, volveré.', 'Buen precio y rápido.', 'La salsa pica bastante.',
+            'Porciones generosas.', 'Tardaron un poco pero valió la pena.', 'Lo mejor de la colonia.',
+            'Regular, esperaba más.', 'Limpio y amable.', None, None]
+
+# Sesgo hacia calificaciones altas, como en reseñas reales
+RATING_WEIGHTS = [1, 2, 10, 20, 20]
+
+
+def pick_city(rng):
+    """Ciudad al azar, ponderada por su tamaño"""
+    return rng.choices(CITIES, weights=[city[4] for city in CITIES])[0]
+
+
+def random_point(rng, city=None):
+    """(lat, lng, ciudad) con dispersión normal alrededor del centro de la ciudad"""
+    city = city or pick_city(rng)
+    _, _, lat, lng, _, spread = city
+    return lat + rng.gauss(0, spread), lng + rng.gauss(0, spread), city
+
+
+def _user_rows(rng, start, count, password_hash, now):
+    for index in range(start, start + count):
+        yield {
+            'username': f'bench{index}',
+            'email': f'bench{index}@quadra.test',
+            'password_hash': password_hash,
+            'created_at': now - timedelta(days=rng.randint(0, 720)),
+            'is_active': True,
+            'password_generation': 1,
+        }
+
+
+def _stand_row(rng, owner_id, now):
+    latitude, longitude, city = random_point(rng)
+    municipality, state = city[0], city[1]
+    food = rng.choice(FOODS)
+    created_at = now - timedelta(days=rng.randint(0, 720), seconds=rng.randint(0, 86400))
+    return {
+        'name': f'{food} {rng.choice(NAMES)}',
+        'description': f'{food} {rng.choice(ADJECTIVES)} en {municipality}.',
+        'latitude': latitude,
+        'longitude': longitude,
+        'address': f'Calle {rng.randint(1, 200)} #{rng.randint(1, 999)}',
+        'municipality': municipality,
+        'state': state,
+        'neighborhood': rng.choice(NEIGHBORHOODS),
+        'postal_code': f'{rng.randint(1000, 99999):05d}',
+        'geohash': encode_geohash(latitude, longitude),
+        'rating_sum': 0,
+        'review_count': 0,
+        'created_at': created_at,
+        'updated_at': created_at,
+        'is_active': True,
+        'user_id': owner_id,
+    }
+
+
+def _insert_returning_ids(connection, table, rows):
+    """executemany que devuelve los ids en el orden de las filas"""
+    result = connection.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows)
+    return [row.id for row in result]
+
+
+def generate(users=100, stands=1000, reviews=3000, seed=42, password=DEFAULT_PASSWORD,
+             batch_size=5000, progress=None):
+    """Agrega usuarios, puestos y reseñas sintéticos a la base de la app actual.
+
+    Las reseñas se reparten al azar entre los puestos (a lo más una por
+    usuario y puesto). progress(etapa, hechos, total) informa el avance.
+    Devuelve un dict con los ids y nombres de usuario, los ids de puestos y
+    la cantidad de reseñas.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = hash_password(password)
+    users_table, stands_table, reviews_table = User.__table__, FoodStand.__table__, Review.__table__
+    reviews = min(reviews, stands * users)
+
+    with db.engine.connect() as connection:
+        start = connection.execute(select(func.count()).select_from(users_table)).scalar()
+
+    user_ids, usernames, stand_ids = [], [], []
+    for offset in range(0, users, batch_size):
+        count = min(batch_size, users - offset)
+        with db.engine.begin() as connection:
+            rows = list(_user_rows(rng, start + offset, count, password_hash, now))
+            user_ids += _insert_returning_ids(connection, users_table, rows)
+            usernames += [row['username'] for row in rows]
+        if progress:
+            progress('usuarios', len(user_ids), users)
+
+    # Reseñas por puesto: reparto multinomial del total
+    per_stand = [0] * stands
+    for _ in range(reviews):
+        per_stand[rng.randrange(stands)] += 1
+
+    inserted_reviews = 0
+    for offset in range(0, stands, batch_size):
+        count = min(batch_size, stands - offset)
+        stand_rows = [_stand_row(rng, rng.choice(user_ids), now) for _ in range(count)]
+        stand_reviews = []
+        for row, review_count in zip(stand_rows, per_stand[offset:offset + count]):
+            review_count = min(review_count, len(user_ids))
+            ratings = rng.choices(range(1, 6), weights=RATING_WEIGHTS, k=review_count)
+            row['rating_sum'] = sum(ratings)
+            row['review_count'] = review_count
+            row['bayesian_score'] = leaderboard.bayesian_score(row['rating_sum'], review_count)
+            stand_reviews.append((rng.sample(user_ids, review_count), ratings, row['created_at']))
+
+        with db.engine.begin() as connection:
+            batch_ids = _insert_returning_ids(connection, stands_table, stand_rows)
+            stand_ids += batch_ids
+            review_rows = []
+            for stand_id, (authors, ratings, opened_at) in zip(batch_ids, stand_reviews):
+                for author_id, rating in zip(authors, ratings):
+                    created_at = opened_at + (now - opened_at) * rng.random()
+                    review_rows.append({
+                        'rating': rating,
+                        'comment': rng.choice(COMMENTS),
+                        'created_at': created_at,
+                        'updated_at': created_at,
+                        'user_id': author_id,
+                        'food_stand_id': stand_id,
+                    })
+            if review_rows:
+                connection.execute(insert(reviews_table), review_rows)
+        inserted_reviews += len(review_rows)
+        if progress:
+            progress('puestos', offset + count, stands)
+
+    with db.engine.begin() as connection:
+        leaderboard.rebuild(connection)
+        versioning.bump(connection)
+
+    return {'user_ids': user_ids, 'usernames': usernames, 'stand_ids': stand_ids, 'reviews': inserted_reviews}
@@ -0,0 +1,460 @@
+"""
+Generador de carga HTTP de extremo a extremo.
+
+Cada proceso es un usuario virtual: inicia sesión por /auth/login (con el
+token CSRF del formulario) con uno de los usuarios del manifiesto de
+benchmarks/seed.py y repite una mezcla ponderada de peticiones hasta que se
+acaba el tiempo, sin pausas salvo --think-ms (modelo cerrado). Al final se
+juntan los resultados de todos los procesos y se informa por endpoint:
+peticiones, throughput, tasa de error, percentiles e histograma de latencia.
+
+Con --spawn levanta la app en local (python start.py serve) con el rate
+limit de login relajado y la detiene al terminar; sin él apunta a --url, y
+ese servidor necesita RATELIMIT_LOGIN (intentos por IP) por encima de
+--processes: todos los usuarios virtuales salen de la misma IP. Si un login
+recibe 429, la prueba se detiene con un aviso en vez de medir sin sesión.
+
+Uso (desde la raíz del proyecto)::
+
+    python -m benchmarks.seed --users 500 --stands 20000 --reviews 60000
+    python -m benchmarks.load --spawn --processes 16 --duration 60
+    RATELIMIT_LOGIN=1000000/60 python start.py serve     # en el servidor de --url
+    python -m benchmarks.load --url http://staging:8000 --mix nearby=50,add_review=0
+"""
+
+import argparse
+import bisect
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load-manifest.json')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mezcla por omisión (pesos relativos)
+DEFAULT_MIX = {
+    'index': 20,
+    'dashboard': 10,
+    'dashboard_radius': 15,
+    'dashboard_search': 15,
+    'nearby': 20,
+    'view_stand': 15,
+    'add_review': 5,
+}
+
+# Límites superiores de las cubetas del histograma (segundos): crecen 20% por cubeta
+BUCKETS = [0.0005 * 1.2 ** index for index in range(70)]
+DISPLAY_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, math.inf)
+
+CSRF_PATTERN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+class Histogram:
+    """Histograma de latencias en cubetas geométricas (se puede sumar entre procesos)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """Límite superior de la cubeta que contiene el percentil"""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(self.total * fraction)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return self.max
+
+    def display_rows(self):
+        """(etiqueta, cantidad) agrupando las cubetas en rangos legibles"""
+        rows = [[label, 0] for label in _display_labels()]
+        for index, count in enumerate(self.counts):
+            upper_ms = (BUCKETS[index] if index < len(BUCKETS) else math.inf) * 1000
+            rows[_display_index(upper_ms)][1] += count
+        return rows
+
+
+def _display_index(upper_ms):
+    for index, bound in enumerate(DISPLAY_BOUNDS_MS):
+        if upper_ms <= bound * 1.0001:
+            return index
+    return len(DISPLAY_BOUNDS_MS) - 1
+
+
+def _display_labels():
+    labels, lower = [], 0
+    for bound in DISPLAY_BOUNDS_MS:
+        labels.append(f'> {lower} ms' if bound == math.inf else f'{lower}-{bound} ms')
+        lower = bound
+    return labels
+
+
+class EndpointStats:
+    def __init__(self):
+        self.histogram = Histogram()
+        self.errors = 0
+        self.statuses = {}
+
+    def record(self, seconds, status, ok):
+        self.histogram.add(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.errors += other.errors
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+
+class VirtualUser:
+    """Sesión HTTP de un usuario sembrado"""
+
+    def __init__(self, base_url, manifest, username, rng, timeout):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.manifest = manifest
+        self.username = username
+        self.rng = rng
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.csrf_token = None
+        self.city_weights = [city['weight'] for city in manifest['cities']]
+
+    def request(self, method, path, data=None):
+        response = self.http.request(method, self.base_url + path, data=data,
+                                     allow_redirects=False, timeout=self.timeout)
+        # El token CSRF de la sesión se toma de cualquier formulario recibido
+        if 'text/html' in response.headers.get('Content-Type', ''):
+            match = CSRF_PATTERN.search(response.text)
+            if match:
+                self.csrf_token = match.group(1)
+        return response
+
+    def login(self):
+        """GET del formulario (token CSRF) y POST de credenciales; éxito = 302"""
+        self.request('GET', '/auth/login')
+        response = self.request('POST', '/auth/login', data={
+            'username': self.username,
+            'password': self.manifest['password'],
+            'csrf_token': self.csrf_token or '',
+        })
+        return response
+
+    def point(self):
+        city = self.rng.choices(self.manifest['cities'], weights=self.city_weights)[0]
+        return (city['latitude'] + self.rng.gauss(0, city['spread']),
+                city['longitude'] + self.rng.gauss(0, city['spread']))
+
+    def stand_id(self):
+        return self.rng.choice(self.manifest['stand_ids'])
+
+    # Operaciones de la mezcla: (método, ruta, datos, estados esperados)
+
+    def op_index(self):
+        return 'GET', '/', None, (200,)
+
+    def op_dashboard(self):
+        return 'GET', '/dashboard', None, (200,)
+
+    def op_dashboard_radius(self):
+        lat, lng = self.point()
+        query = urlencode({'lat': f'{lat:.5f}', 'lng': f'{lng:.5f}', 'radius': self.rng.choice((2, 5, 10))})
+        return 'GET', f'/dashboard?{query}', None, (200,)
+
+    def op_dashboard_search(self):
+        query = urlencode({'search': self.rng.choice(self.manifest['search_terms'])})
+        return 'GET', f'/dashboard?{query}', None, (200,)
+
+    def op_nearby(self):
+        lat, lng = self.point()
+        query = urlencode({'lat': f'{lat:.5f}', 'lng': f'{lng:.5f}', 'radius': self.rng.choice((2, 5, 10))})
+        return 'GET', f'/api/stands/nearby?{query}', None, (200,)
+
+    def op_view_stand(self):
+        return 'GET', f'/stands/{self.stand_id()}', None, (200,)
+
+    def op_add_review(self):
+        # La vista siempre redirige al puesto (también si ya existía la reseña)
+        data = {
+            'rating': self.rng.choices(range(1, 6), weights=(1, 2, 10, 20, 20))[0],
+            'comment': 'Reseña de prueba de carga',
+            'csrf_token': self.csrf_token or '',
+        }
+        return 'POST', f'/stands/{self.stand_id()}/review', data, (302,)
+
+
+def run_worker(index, options, manifest, mix, results):
+    """Proceso de un usuario virtual; deja sus estadísticas en la cola results"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    rng = random.Random(options['seed'] + index)
+    username = manifest['usernames'][index % len(manifest['usernames'])]
+    user = VirtualUser(options['url'], manifest, username, rng, options['timeout'])
+    stats = {name: EndpointStats() for name in mix}
+    stats['login'] = EndpointStats()
+    names, weights = list(mix), list(mix.values())
+
+    # Escalonar el arranque para no concentrar todos los logins
+    time.sleep(rng.random() * options['ramp_up'])
+    started = time.perf_counter()
+    try:
+        response = user.login()
+        stats['login'].record(time.perf_counter() - started, response.status_code,
+                              response.status_code == 302)
+        logged_in = response.status_code == 302
+    except Exception as e:
+        stats['login'].record(time.perf_counter() - started, type(e).__name__, False)
+        logged_in = False
+
+    if logged_in:
+        while time.time() < options['deadline']:
+            name = rng.choices(names, weights=weights)[0]
+            method, path, data, expected = getattr(user, f'op_{name}')()
+            started = time.perf_counter()
+            try:
+                status = user.request(method, path, data).status_code
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            # Las peticiones del calentamiento no cuentan
+            if time.time() >= options['measure_from']:
+                stats[name].record(elapsed, status, status in expected)
+            if options['think']:
+                time.sleep(options['think'])
+
+    results.put((index, logged_in, stats))
+
+
+def parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, (text or '').split(',')):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f'Operación desconocida: {name} (opciones: {", ".join(DEFAULT_MIX)})')
+        mix[name] = float(weight)
+    mix = {name: weight for name, weight in mix.items() if weight > 0}
+    if not mix:
+        raise ValueError('La mezcla no tiene operaciones con peso positivo')
+    return mix
+
+
+def spawn_server(port, workers, threads, log_path):
+    """Levanta `python start.py serve` con el rate limit de login relajado"""
+    env = dict(os.environ, RATELIMIT_LOGIN='1000000/60', RATELIMIT_LOGIN_ACCOUNT='1000000/60')
+    log = open(log_path, 'w')
+    process = subprocess.Popen(
+        [sys.executable, 'start.py', 'serve', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--threads', str(threads)],
+        cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    return process, log
+
+
+def wait_until_ready(url, process=None, timeout=60):
+    import requests
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError('El servidor terminó antes de estar listo')
+        try:
+            if requests.get(url.rstrip('/') + '/landing', timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f'El servidor no respondió en {timeout} s')
+
+
+def format_ms(seconds):
+    return f'{seconds * 1000:9.1f}'
+
+
+def print_report(stats, duration, histograms=True):
+    total_requests = sum(s.histogram.total for name, s in stats.items() if name != 'login')
+    total_errors = sum(s.errors for name, s in stats.items() if name != 'login')
+
+    header = (f'{"endpoint":<18} {"peticiones":>10} {"req/s":>8} {"errores":>8} '
+              f'{"p50 ms":>9} {"p90 ms":>9} {"p99 ms":>9} {"máx ms":>9}')
+    print(header)
+    print('-' * len(header))
+    for name, endpoint in stats.items():
+        histogram = endpoint.histogram
+        if not histogram.total:
+            continue
+        rate = histogram.total / duration if name != 'login' else 0
+        error_rate = endpoint.errors / histogram.total
+        print(f'{name:<18} {histogram.total:>10} {rate:>8.1f} {error_rate:>8.1%} '
+              f'{format_ms(histogram.percentile(0.5))} {format_ms(histogram.percentile(0.9))} '
+              f'{format_ms(histogram.percentile(0.99))} {format_ms(histogram.max)}')
+    print('-' * len(header))
+    print(f'{"total":<18} {total_requests:>10} {total_requests / duration:>8.1f} '
+          f'{(total_errors / total_requests if total_requests else 0):>8.1%}')
+
+    failing = [(name, s) for name, s in stats.items() if s.errors]
+    if failing:
+        print('\nEstados de los endpoints con errores (estado: cantidad):')
+        for name, endpoint in failing:
+            print(f'   {name:<18} ' + ', '.join(f'{status}: {count}' for status, count in endpoint.statuses.items()))
+
+    if histograms:
+        for name, endpoint in stats.items():
+            histogram = endpoint.histogram
+            if not histogram.total or name == 'login':
+                continue
+            print(f'\n{name}')
+            for label, count in endpoint.histogram.display_rows():
+                if not count:
+                    continue
+                bar = '█' * max(1, round(40 * count / histogram.total))
+                print(f'   {label:>15} {count:>8} {count / histogram.total:>6.1%} {bar}')
+
+
+def to_json(stats, duration):
+    return {
+        'duration': duration,
+        'endpoints': {
+            name: {
+                'requests': s.histogram.total,
+                'errors': s.errors,
+                'statuses': {str(status): count for status, count in s.statuses.items()},
+                'p50': s.histogram.percentile(0.5),
+                'p90': s.histogram.percentile(0.9),
+                'p99': s.histogram.percentile(0.99),
+                'max': s.histogram.max,
+                'mean': s.histogram.sum / s.histogram.total if s.histogram.total else 0,
+                'histogram': {'bounds': BUCKETS, 'counts': s.histogram.counts},
+            } for name, s in stats.items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga HTTP de QUADRA')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--spawn', action='store_true',
+                        help='Levantar el servidor local (start.py serve) durante la prueba')
+    parser.add_argument('--port', type=int, default=5055, help='Puerto del servidor con --spawn')
+    parser.add_argument('--server-workers', type=int, default=2)
+    parser.add_argument('--server-threads', type=int, default=4)
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST)
+    parser.add_argument('--processes', type=int, default=8, help='Usuarios virtuales (un proceso cada uno)')
+    parser.add_argument('--duration', type=float, default=30, help='Segundos medidos')
+    parser.add_argument('--warmup', type=float, default=5, help='Segundos iniciales que no se miden')
+    parser.add_argument('--ramp-up', type=float, default=2, help='Segundos en que se reparten los logins')
+    parser.add_argument('--think-ms', type=float, default=0, help='Pausa entre peticiones de un usuario')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--mix', help='Pesos, p. ej. nearby=50,add_review=0 '
+                                      f'(por omisión {",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items())})')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', dest='json_path', help='Guardar los resultados en JSON')
+    parser.add_argument('--no-histograms', dest='histograms', action='store_false')
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    with open(args.manifest, encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    server = log = None
+    url = args.url
+    if args.spawn:
+        url = f'http://127.0.0.1:{args.port}'
+        log_path = os.path.join(PROJECT_ROOT, 'instance', 'load-server.log')
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        server, log = spawn_server(args.port, args.server_workers, args.server_threads, log_path)
+        print(f'🚀 Servidor en {url} (log: {log_path})', file=sys.stderr)
+
+    try:
+        wait_until_ready(url, server)
+        now = time.time()
+        measure_from = now + args.ramp_up + args.warmup
+        options = {
+            'url': url,
+            'seed': args.seed,
+            'timeout': args.timeout,
+            'ramp_up': args.ramp_up,
+            'think': args.think_ms / 1000,
+            'measure_from': measure_from,
+            'deadline': measure_from + args.duration,
+        }
+
+        print(f'⏱️  {args.processes} usuarios, {args.warmup:.0f} s de calentamiento y '
+              f'{args.duration:.0f} s medidos', file=sys.stderr)
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        workers = [context.Process(target=run_worker, args=(index, options, manifest, mix, results))
+                   for index in range(args.processes)]
+        for worker in workers:
+            worker.start()
+
+        merged = {'login': EndpointStats(), **{name: EndpointStats() for name in mix}}
+        logged_in = 0
+        login_limited = False
+        for _ in workers:
+            _, ok, stats = results.get()
+            logged_in += ok
+            for name, endpoint in stats.items():
+                merged[name].merge(endpoint)
+            # Un 429 en el login es el rate limit del servidor, no una medición
+            if stats['login'].statuses.get(429):
+                login_limited = True
+                break
+        for worker in workers:
+            if login_limited:
+                worker.terminate()
+            worker.join()
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+            log.close()
+
+    if login_limited:
+        print(f'⚠️  El servidor respondió 429 al iniciar sesión: su límite de login por IP es '
+              f'menor que los {args.processes} usuarios virtuales. Levántalo con '
+              f'RATELIMIT_LOGIN=1000000/60 (y RATELIMIT_LOGIN_ACCOUNT=1000000/60) o usa --spawn.',
+              file=sys.stderr)
+        return 2
+
+    print(f'\nUsuarios con sesión: {logged_in}/{args.processes}')
+    print_report(merged, args.duration, args.histograms)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(to_json(merged, args.duration), f, indent=2)
+        print(f'\n✅ Resultados en {args.json_path}')
+    return 0 if logged_in else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
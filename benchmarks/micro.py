@@ -0,0 +1,307 @@
+"""
+Micro-benchmarks de los caminos críticos de modelos y geo.
+
+Para cada escala (cantidad de puestos) genera datos sintéticos en una base
+SQLite temporal y mide:
+
+- FoodStand.distance_to y FoodStand.average_rating (por llamada; cada
+  muestra promedia un lote de llamadas para que el reloj no domine)
+- FoodStand.find_within_radius alrededor de puntos de ciudades con puestos
+- FoodStand.find_by_location por municipio y por estado
+- resize_image sobre JPEG sintéticos de varios tamaños (no depende de la escala)
+
+Informa llamadas por segundo y percentiles p50/p90/p99. Con --save guarda el
+resultado como línea base (benchmarks/baselines/<nombre>.json) y con
+--compare lo contrasta con una línea base: termina con código 1 si algún caso
+es más lento que el umbral.
+
+Uso (desde la raíz del proyecto)::
+
+    python -m benchmarks.micro --sizes 1000 10000 100000 --save
+    python -m benchmarks.micro --compare --threshold 0.25
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+IMAGE_SIZES = ((1024, 768), (2048, 1536), (4032, 3024))
+
+
+def percentile(ordered, fraction):
+    """Percentil con interpolación lineal sobre una lista ordenada"""
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples):
+    """Estadísticas de una lista de duraciones por llamada (segundos)"""
+    ordered = sorted(samples)
+    mean = sum(ordered) / len(ordered)
+    return {
+        'samples': len(ordered),
+        'ops_per_sec': 1 / mean if mean else 0.0,
+        'mean': mean,
+        'p50': percentile(ordered, 0.50),
+        'p90': percentile(ordered, 0.90),
+        'p99': percentile(ordered, 0.99),
+        'max': ordered[-1],
+    }
+
+
+def measure(call, samples, inner=1, warmup=3, after=None):
+    """Duración por llamada de `samples` muestras de `inner` llamadas.
+
+    after() se ejecuta fuera del tiempo medido (p. ej. limpiar la sesión).
+    """
+    for _ in range(warmup):
+        call()
+        if after:
+            after()
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        for _ in range(inner):
+            call()
+        durations.append((time.perf_counter() - started) / inner)
+        if after:
+            after()
+    return durations
+
+
+def build_app(database_path):
+    """App con la base SQLite indicada y el esquema listo"""
+    from app import create_app, db
+    from app.services import search
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
+        'REPLICA_DATABASE_URLS': '',
+        'DB_PROFILE': 'auto',
+    })
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            search.install(connection)
+    return app
+
+
+def prepare_dataset(data_dir, size, reviews_per_stand, seed):
+    """Base con `size` puestos; se reutiliza si ya existe en data_dir"""
+    from app import db
+    from benchmarks import dataset
+
+    path = os.path.join(data_dir, f'bench-{size}-{reviews_per_stand}-{seed}.db')
+    reuse = os.path.exists(path)
+    app = build_app(path)
+    if not reuse:
+        started = time.perf_counter()
+        with app.app_context():
+            dataset.generate(users=max(50, size // 10), stands=size,
+                             reviews=size * reviews_per_stand, seed=seed)
+            db.session.remove()
+        print(f'   datos: {size} puestos en {time.perf_counter() - started:.1f} s', file=sys.stderr)
+    return app
+
+
+def model_cases(app, size, samples, seed):
+    """Mide los métodos del modelo sobre la base de la app"""
+    from app import db
+    from app.models.food_stand import FoodStand
+    from benchmarks.dataset import CITIES, random_point
+
+    rng = random.Random(seed)
+    results = {}
+    with app.app_context():
+        stands = FoodStand.query.filter_by(is_active=True).limit(1000).all()
+        points = [random_point(rng)[:2] for _ in range(1000)]
+        # Entradas precalculadas: solo se mide la llamada
+        pairs = itertools.cycle([(rng.choice(stands), lat, lng) for lat, lng in points])
+        loaded = itertools.cycle(stands)
+
+        def distance_to():
+            stand, lat, lng = next(pairs)
+            stand.distance_to(lat, lng)
+
+        def average_rating():
+            next(loaded).average_rating
+
+        results['distance_to'] = measure(distance_to, samples, inner=1000)
+        results['average_rating'] = measure(average_rating, samples, inner=1000)
+
+        def within_radius():
+            lat, lng = points[rng.randrange(len(points))]
+            FoodStand.find_within_radius(lat, lng, 5)
+
+        def by_municipality():
+            FoodStand.find_by_location(municipality=rng.choice(CITIES)[0])
+
+        def by_state():
+            FoodStand.find_by_location(state=rng.choice(CITIES)[1])
+
+        # Sin objetos acumulados en el mapa de identidad entre muestras
+        cleanup = db.session.expunge_all
+        results['find_within_radius'] = measure(within_radius, samples, after=cleanup)
+        results['find_by_location[municipality]'] = measure(by_municipality, samples, after=cleanup)
+        results['find_by_location[state]'] = measure(by_state, samples, after=cleanup)
+        db.session.remove()
+
+    return {f'{name}@{size}': summarize(durations) for name, durations in results.items()}
+
+
+def image_cases(work_dir, samples):
+    """Mide resize_image sobre copias de JPEG sintéticos"""
+    from PIL import Image
+    from app.services.images import resize_image
+
+    results = {}
+    for width, height in IMAGE_SIZES:
+        source = os.path.join(work_dir, f'source-{width}x{height}.jpg')
+        target = os.path.join(work_dir, f'resize-{width}x{height}.jpg')
+        channels = [
+            Image.effect_noise((width, height), 48),
+            Image.linear_gradient('L').resize((width, height)),
+            Image.radial_gradient('L').resize((width, height)),
+        ]
+        Image.merge('RGB', channels).save(source, quality=90)
+
+        def copy_source():
+            shutil.copyfile(source, target)
+
+        copy_source()
+        results[f'resize_image@{width}x{height}'] = summarize(
+            measure(lambda: resize_image(target), samples, warmup=1, after=copy_source)
+        )
+    return results
+
+
+def format_duration(seconds):
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:8.2f} µs'
+    return f'{seconds * 1e3:8.2f} ms'
+
+
+def print_report(results, baseline=None, threshold=0.25):
+    """Tabla de resultados; con baseline agrega la variación del p50"""
+    header = f'{"caso":<42} {"ops/s":>12} {"p50":>11} {"p90":>11} {"p99":>11}'
+    if baseline:
+        header += f' {"Δ p50":>9}'
+    print(header)
+    print('-' * len(header))
+
+    regressions = []
+    for name, stats in results.items():
+        line = (f'{name:<42} {stats["ops_per_sec"]:>12,.1f} {format_duration(stats["p50"])} '
+                f'{format_duration(stats["p90"])} {format_duration(stats["p99"])}')
+        reference = (baseline or {}).get(name)
+        if reference:
+            change = stats['p50'] / reference['p50'] - 1 if reference['p50'] else 0.0
+            flag = ''
+            if change > threshold:
+                regressions.append((name, change))
+                flag = ' ⚠️'
+            line += f' {change:>+8.1%}{flag}'
+        elif baseline:
+            line += f' {"nuevo":>9}'
+        print(line)
+    return regressions
+
+
+def baseline_path(name):
+    return name if name.endswith('.json') else os.path.join(BASELINE_DIR, f'{name}.json')
+
+
+def load_baseline(name):
+    with open(baseline_path(name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(name, results, args):
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    document = {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'parameters': {
+            'sizes': args.sizes,
+            'reviews_per_stand': args.reviews_per_stand,
+            'samples': args.samples,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks de modelos y geo de QUADRA')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Cantidades de puestos a generar (una base por escala)')
+    parser.add_argument('--reviews-per-stand', type=int, default=3)
+    parser.add_argument('--samples', type=int, default=30, help='Muestras por caso')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', help='Conservar y reutilizar aquí las bases generadas')
+    parser.add_argument('--skip-images', action='store_true', help='No medir resize_image')
+    parser.add_argument('--save', nargs='?', const='micro', metavar='NOMBRE',
+                        help='Guardar como línea base (por omisión micro)')
+    parser.add_argument('--compare', nargs='?', const='micro', metavar='NOMBRE',
+                        help='Comparar con una línea base (por omisión micro)')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Aumento relativo del p50 que cuenta como regresión')
+    args = parser.parse_args(argv)
+
+    from app import db
+
+    baseline = load_baseline(args.compare)['results'] if args.compare else None
+
+    work_dir = tempfile.mkdtemp(prefix='quadra-bench-')
+    data_dir = args.data_dir or work_dir
+    os.makedirs(data_dir, exist_ok=True)
+    results = {}
+    try:
+        for size in args.sizes:
+            print(f'⏱️  Escala {size} puestos', file=sys.stderr)
+            app = prepare_dataset(data_dir, size, args.reviews_per_stand, args.seed)
+            results.update(model_cases(app, size, args.samples, args.seed))
+            with app.app_context():
+                db.engine.dispose()
+        if not args.skip_images:
+            print('⏱️  resize_image', file=sys.stderr)
+            results.update(image_cases(work_dir, max(3, args.samples // 3)))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    regressions = print_report(results, baseline, args.threshold)
+    if args.save:
+        print(f'✅ Línea base guardada en {save_baseline(args.save, results, args)}')
+    if regressions:
+        print(f'⚠️  {len(regressions)} caso(s) más lentos que la línea base (> {args.threshold:.0%})')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Cota de consultas SQL por vista.
+
+Siembra una base SQLite temporal con datos sintéticos en dos escalas, inicia
+sesión con el cliente de pruebas de Flask y cuenta las sentencias de cada
+vista con count_queries (services/projections.py). Falla (código 1) si una
+vista supera su cota o si su cantidad de consultas crece con la cantidad de
+puestos, que es la firma de un N+1.
+
+Las cachés en proceso (identidad, facetas, versión de datos) se calientan con
+una primera petición; se mide la segunda, como en un worker ya en marcha.
+
+Uso (desde la raíz del proyecto)::
+
+    python -m benchmarks.queries
+    python -m benchmarks.queries --sizes 50 500 -v
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from benchmarks import dataset
+
+# (nombre, ruta, cota de consultas); se piden con la sesión iniciada
+CASES = [
+    ('index', '/', 2),
+    ('stands', '/stands/', 1),
+    ('nearby', '/api/stands/nearby?lat=19.4326&lng=-99.1332&radius=5', 2),
+    ('dashboard', '/dashboard', 3),
+]
+
+DEFAULT_SIZES = (50, 500)
+
+
+def build_app(database_path):
+    """App sobre una base temporal, sin CSRF ni límite de login"""
+    from app import create_app, db
+    from app.services import search
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
+        'REPLICA_DATABASE_URLS': '',
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_LOGIN': '1000000/60',
+        'RESET_TOKEN_SWEEP_INTERVAL': 0,
+    })
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            search.install(connection)
+    return app
+
+
+def measure(app, username, password):
+    """{caso: (consultas, sentencias)} de una escala ya sembrada"""
+    from app.services.projections import count_queries
+
+    client = app.test_client()
+    response = client.post('/auth/login', data={'username': username, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f'No se pudo iniciar sesión como {username} ({response.status_code})')
+
+    results = {}
+    with app.app_context():
+        for name, path, _ in CASES:
+            # Primera petición: calienta las cachés del proceso
+            client.get(path)
+            with count_queries() as counter:
+                response = client.get(path)
+            if response.status_code != 200:
+                raise RuntimeError(f'{path} respondió {response.status_code}')
+            results[name] = (counter.count, counter.statements)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Comprueba la cota de consultas SQL por vista')
+    parser.add_argument('--sizes', type=int, nargs=2, default=list(DEFAULT_SIZES),
+                        metavar=('CHICA', 'GRANDE'), help='Cantidades de puestos a comparar')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-v', '--verbose', action='store_true', help='Mostrar las sentencias de cada vista')
+    args = parser.parse_args(argv)
+
+    from app import db
+
+    work_dir = tempfile.mkdtemp(prefix='quadra-queries-')
+    counts = {}
+    try:
+        for size in args.sizes:
+            app = build_app(os.path.join(work_dir, f'queries-{size}.db'))
+            with app.app_context():
+                result = dataset.generate(users=20, stands=size, reviews=size * 3, seed=args.seed)
+                db.session.remove()
+            counts[size] = measure(app, result['usernames'][0], dataset.DEFAULT_PASSWORD)
+            with app.app_context():
+                db.engine.dispose()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    small, large = args.sizes
+    header = f'{"vista":<12} {"cota":>5} {small:>8} {large:>8}'
+    print(header)
+    print('-' * len(header))
+    failures = []
+    for name, path, bound in CASES:
+        low, high = counts[small][name][0], counts[large][name][0]
+        flag = ''
+        if high > bound or low > bound:
+            failures.append(f'{path}: {max(low, high)} consultas (cota {bound})')
+            flag = ' ⚠️'
+        elif high > low:
+            failures.append(f'{path}: crece de {low} a {high} consultas con más puestos')
+            flag = ' ⚠️'
+        print(f'{name:<12} {bound:>5} {low:>8} {high:>8}{flag}')
+        if args.verbose:
+            for statement in counts[large][name][1]:
+                print(f'    {" ".join(statement.split())[:150]}')
+
+    if failures:
+        for failure in failures:
+            print(f'⚠️  {failure}')
+        return 1
+    print('✅ Todas las vistas dentro de su cota de consultas')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Sembrado de datos sintéticos para pruebas de carga.
+
+Agrega usuarios, puestos y reseñas (benchmarks/dataset.py) a la base que usa
+la aplicación según su configuración (DATABASE_URL o instance/quadra.db) y
+escribe un manifiesto JSON que lee benchmarks/load.py: contraseña y nombres de
+los usuarios, ids de puestos, ciudades para elegir coordenadas y términos de
+búsqueda.
+
+No usar contra una base de producción.
+
+Uso (desde la raíz del proyecto)::
+
+    python -m benchmarks.seed --users 2000 --stands 50000 --reviews 200000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy.engine import make_url
+
+from benchmarks import dataset
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load-manifest.json')
+
+
+def write_manifest(path, result, password, database_url):
+    manifest = {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'database': database_url,
+        'password': password,
+        'usernames': result['usernames'],
+        'stand_ids': result['stand_ids'],
+        'cities': [
+            {'municipality': municipality, 'state': state, 'latitude': lat, 'longitude': lng,
+             'weight': weight, 'spread': spread}
+            for municipality, state, lat, lng, weight, spread in dataset.CITIES
+        ],
+        'search_terms': sorted({food.split()[0] for food in dataset.FOODS} | set(dataset.FOODS)),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Siembra datos sintéticos para pruebas de carga')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--stands', type=int, default=10000)
+    parser.add_argument('--reviews', type=int, default=30000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--password', default=dataset.DEFAULT_PASSWORD,
+                        help='Contraseña de todos los usuarios sembrados')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST)
+    args = parser.parse_args(argv)
+
+    if args.users < 2 or args.stands < 1:
+        parser.error('Se necesitan al menos 2 usuarios y 1 puesto')
+
+    from app import create_app
+    from app.run import init_db
+
+    app = create_app()
+    init_db(app)
+
+    def progress(stage, done, total):
+        print(f'   {stage:<9} {done:>9}/{total}', file=sys.stderr)
+
+    started = time.perf_counter()
+    with app.app_context():
+        result = dataset.generate(users=args.users, stands=args.stands, reviews=args.reviews,
+                                  seed=args.seed, password=args.password,
+                                  batch_size=args.batch_size, progress=progress)
+
+    # Sin la contraseña de la base en el manifiesto
+    database_url = make_url(app.config['SQLALCHEMY_DATABASE_URI']).render_as_string(hide_password=True)
+    write_manifest(args.manifest, result, args.password, database_url)
+    print(f'✅ Sembrados {len(result["usernames"])} usuarios, {len(result["stand_ids"])} puestos y '
+          f'{result["reviews"]} reseñas en {time.perf_counter() - started:.1f} s')
+    print(f'📄 Manifiesto: {args.manifest}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,8 +2,17 @@
 """
 Punto de entrada principal para la aplicación QUADRA
 Ejecutar desde el directorio raíz del proyecto
+
+    python start.py          # servidor de desarrollo
+    python start.py serve    # producción: gunicorn con varios workers (ver app/serve.py)
 """
 
+import sys
+
 if __name__ == '__main__':
-    from app.run import main
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from app.serve import main
+        main(sys.argv[2:])
+    else:
+        from app.run import main
+        main()